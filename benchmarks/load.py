@@ -0,0 +1,462 @@
+"""End-to-end load test of the async-views example
+
+Boots `examples/async-views` with a SQLite database under local servers and
+drives sync and async views of every scenario of its `load_views.py` over
+keep-alive connections from an asyncio load generator, with a ramp of
+concurrent connections. Requests/sec and latency percentiles are reported
+side by side for sync and async views.
+
+    python benchmarks/load.py                             # uvicorn, gunicorn
+    python benchmarks/load.py --server wsgiref            # stdlib only
+    python benchmarks/load.py -k query --concurrency 1,16,64 --duration 3
+    python benchmarks/load.py --setting RAW_API_JSON_BACKEND='"orjson"'
+    python benchmarks/load.py --save results.json
+
+`uvicorn` (ASGI) and `gunicorn` (WSGI) aren't dependencies of raw_api, install
+them to use them. The load generator shares the machine with the server, so
+compare numbers of one run, not of different machines.
+"""
+
+import argparse
+import asyncio
+import importlib.util
+import json
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from collections import Counter
+from pathlib import Path
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+ROOT = Path(__file__).resolve().parent.parent
+EXAMPLE = ROOT / "examples" / "async-views"
+HOST = "127.0.0.1"
+SERVER_START_TIMEOUT = 30
+
+
+VARIANTS = ("sync", "async")
+
+
+class Scenario(NamedTuple):
+    # Name of the view in `load_views.py`, the scenario name by default
+    view: Optional[str] = None
+    # Variants the view exists in, any other one missing is an error
+    variants: Tuple[str, ...] = VARIANTS
+    method: str = "GET"
+    query: str = ""
+    body: Optional[dict] = None
+    login: bool = False
+    status: int = 200
+    # Repeats requests with `If-None-Match` of the first response
+    revalidate: bool = False
+
+
+SCENARIOS = {
+    "plain": Scenario(),
+    "items": Scenario(),
+    "typed_items": Scenario(),
+    "stream": Scenario(),
+    "queryset": Scenario(),
+    "query": Scenario(query="id=1"),
+    "json": Scenario(
+        method="POST", body={"id": 1, "name": "foo", "tags": ["a", "b"]}
+    ),
+    "user": Scenario(login=True),
+    "stacked": Scenario(query="id=1", login=True),
+    "fused": Scenario(query="id=1", login=True),
+    "cached": Scenario(query="id=1"),
+    "tagged": Scenario(),
+    "tagged_304": Scenario(view="tagged", status=304, revalidate=True),
+    "limited": Scenario(),
+    "coalesced": Scenario(query="id=1", variants=("async",)),
+}
+
+SERVERS = {
+    "uvicorn": lambda port, options: [
+        "-m",
+        "uvicorn",
+        "asgi:application",
+        "--host",
+        HOST,
+        "--port",
+        str(port),
+        "--workers",
+        str(options.workers),
+        "--log-level",
+        "warning",
+        "--no-access-log",
+    ],
+    "gunicorn": lambda port, options: [
+        "-m",
+        "gunicorn",
+        "wsgi:application",
+        "--bind",
+        f"{HOST}:{port}",
+        "--workers",
+        str(options.workers),
+        "--threads",
+        str(options.threads),
+        "--log-level",
+        "warning",
+    ],
+    "wsgiref": lambda port, options: [
+        str(Path(__file__).resolve()),
+        "--serve-wsgiref",
+        str(port),
+    ],
+}
+
+
+class Connection:
+    """Minimal HTTP/1.1 client connection reading whole responses"""
+
+    def __init__(self, port: int):
+        self.port = port
+        self.reader = self.writer = None
+
+    async def request(self, data: bytes):
+        """Sends a raw request, returns status and headers of the response"""
+        if self.writer is None:
+            self.reader, self.writer = await asyncio.open_connection(
+                HOST, self.port
+            )
+        self.writer.write(data)
+        status_line = await self.reader.readline()
+        if not status_line:
+            # Keep-alive connection closed by the server
+            self.close()
+            return await self.request(data)
+        version, status = status_line.split()[:2]
+        status = int(status)
+        headers = {}
+        while True:
+            line = await self.reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            name, value = line.split(b":", 1)
+            headers[name.strip().lower()] = value.strip()
+        if status in (204, 304):
+            pass
+        elif b"content-length" in headers:
+            await self.reader.readexactly(int(headers[b"content-length"]))
+        elif headers.get(b"transfer-encoding") == b"chunked":
+            while True:
+                size = int((await self.reader.readline()).split(b";")[0], 16)
+                await self.reader.readexactly(size + 2)
+                if not size:
+                    break
+        else:
+            await self.reader.read()
+            headers[b"connection"] = b"close"
+        if (
+            version == b"HTTP/1.0"
+            or headers.get(b"connection", b"").lower() == b"close"
+        ):
+            self.close()
+        return status, headers
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+        self.reader = self.writer = None
+
+
+def raw_request(path, scenario, session_key, headers=()) -> bytes:
+    """Builds bytes of an HTTP request of the scenario"""
+    lines = [
+        f"{scenario.method} {path}"
+        f"{'?' + scenario.query if scenario.query else ''} HTTP/1.1",
+        f"Host: {HOST}",
+        *headers,
+    ]
+    if scenario.login:
+        lines.append(f"Cookie: sessionid={session_key}")
+    body = b""
+    if scenario.body is not None:
+        body = json.dumps(scenario.body).encode()
+        lines.append("Content-Type: application/json")
+        lines.append(f"Content-Length: {len(body)}")
+    return ("\r\n".join(lines) + "\r\n\r\n").encode() + body
+
+
+async def prepare_request(port, path, scenario, session_key):
+    """Returns the request to repeat, raises `RuntimeError` if the view
+    doesn't respond as expected"""
+    data = raw_request(path, scenario, session_key)
+    connection = Connection(port)
+    try:
+        status, headers = await connection.request(data)
+        if scenario.revalidate and status == 200:
+            etag = headers[b"etag"].decode()
+            data = raw_request(
+                path, scenario, session_key, [f"If-None-Match: {etag}"]
+            )
+            status, _ = await connection.request(data)
+    finally:
+        connection.close()
+    if status != scenario.status:
+        raise RuntimeError(f"{path} responded with {status}")
+    return data
+
+
+async def load(port, data, concurrency, duration, warmup):
+    """Repeats the request over concurrent connections, returns latencies of
+    requests finished after the warmup and counts of statuses"""
+    connections = [Connection(port) for _ in range(concurrency)]
+    start = time.perf_counter()
+    measure_from = start + warmup
+    deadline = measure_from + duration
+    latencies: List[float] = []
+    statuses: Counter = Counter()
+
+    async def worker(connection):
+        while True:
+            request_start = time.perf_counter()
+            if request_start >= deadline:
+                break
+            status, _ = await connection.request(data)
+            if request_start >= measure_from:
+                latencies.append(time.perf_counter() - request_start)
+                statuses[status] += 1
+
+    try:
+        await asyncio.gather(*(worker(c) for c in connections))
+    finally:
+        for connection in connections:
+            connection.close()
+    return latencies, statuses
+
+
+def percentile(values, percent):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * percent / 100))]
+
+
+async def run_server_scenarios(server, port, session_key, options):
+    rows = []
+    for name, scenario in SCENARIOS.items():
+        if options.k and options.k not in name:
+            continue
+        for variant in scenario.variants:
+            path = f"/load/{variant}/{scenario.view or name}"
+            data = await prepare_request(port, path, scenario, session_key)
+            for concurrency in options.concurrency:
+                latencies, statuses = await load(
+                    port, data, concurrency, options.duration, options.warmup
+                )
+                row = {
+                    "server": server,
+                    "scenario": name,
+                    "variant": variant,
+                    "concurrency": concurrency,
+                    "rps": len(latencies) / options.duration,
+                    "p50_ms": percentile(latencies, 50) * 1000,
+                    "p99_ms": percentile(latencies, 99) * 1000,
+                    "errors": len(latencies) - statuses[scenario.status],
+                }
+                rows.append(row)
+                print(
+                    f"  {name} {variant} x{concurrency}: "
+                    f"{row['rps']:.0f} rps",
+                    file=sys.stderr,
+                )
+    return rows
+
+
+def report(rows):
+    """Prints sync and async results of each scenario side by side"""
+    by_key: Dict[tuple, dict] = {}
+    for row in rows:
+        key = row["server"], row["scenario"], row["concurrency"]
+        by_key.setdefault(key, {})[row["variant"]] = row
+    header = f"{'scenario':<14}{'conc':>6}" + "".join(
+        f"{variant + ' rps':>11}{'p50 ms':>9}{'p99 ms':>9}"
+        for variant in VARIANTS
+    )
+    server = None
+    for (row_server, scenario, concurrency), variants in by_key.items():
+        if row_server != server:
+            server = row_server
+            print(f"\n{server}\n{header}")
+        line = f"{scenario:<14}{concurrency:>6}"
+        for variant in VARIANTS:
+            row = variants.get(variant)
+            if row is None:
+                line += f"{'-':>11}{'-':>9}{'-':>9}"
+                continue
+            rps = f"{row['rps']:.0f}" + ("!" if row["errors"] else "")
+            line += f"{rps:>11}{row['p50_ms']:>9.2f}{row['p99_ms']:>9.2f}"
+        print(line)
+    if any(row["errors"] for row in rows):
+        print("\n! - some responses had unexpected status")
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind((HOST, 0))
+        return sock.getsockname()[1]
+
+
+def wait_for_port(port, process):
+    deadline = time.monotonic() + SERVER_START_TIMEOUT
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"Server exited with {process.returncode}")
+        try:
+            socket.create_connection((HOST, port), timeout=1).close()
+            return
+        except OSError:
+            time.sleep(0.1)
+    raise RuntimeError("Server didn't start")
+
+
+def example_env(db_path, settings):
+    return {
+        **os.environ,
+        "PYTHONPATH": os.pathsep.join([str(ROOT), str(EXAMPLE)]),
+        "DJANGO_SETTINGS_MODULE": "settings",
+        "DB_ENGINE": "django.db.backends.sqlite3",
+        "DB_NAME": str(db_path),
+        "DEBUG": "0",
+        "SLEEP": "0",
+        "EXTRA_SETTINGS": json.dumps({"ALLOWED_HOSTS": [HOST], **settings}),
+    }
+
+
+CREATE_SESSION = """
+from django.contrib.auth import (
+    BACKEND_SESSION_KEY, HASH_SESSION_KEY, SESSION_KEY, get_user_model
+)
+from django.contrib.sessions.backends.db import SessionStore
+user = get_user_model().objects.create_superuser("load", "", "load")
+session = SessionStore()
+session[SESSION_KEY] = str(user.pk)
+session[BACKEND_SESSION_KEY] = "django.contrib.auth.backends.ModelBackend"
+session[HASH_SESSION_KEY] = user.get_session_auth_hash()
+session.create()
+print(session.session_key)
+"""
+
+
+def setup_database(env) -> str:
+    """Creates the database and a session of a staff user, returns its key"""
+    manage = [sys.executable, "manage.py"]
+    subprocess.run(
+        [*manage, "migrate", "-v", "0"], cwd=EXAMPLE, env=env, check=True
+    )
+    output = subprocess.run(
+        [*manage, "shell", "-c", CREATE_SESSION],
+        cwd=EXAMPLE,
+        env=env,
+        check=True,
+        capture_output=True,
+        text=True,
+    ).stdout
+    return output.split()[-1]
+
+
+def run(options):
+    rows = []
+    with tempfile.TemporaryDirectory() as tmp:
+        env = example_env(Path(tmp) / "db.sqlite3", options.settings)
+        session_key = setup_database(env)
+        for server in options.server:
+            port = free_port()
+            command = [sys.executable, *SERVERS[server](port, options)]
+            print(f"{server}: {' '.join(command)}", file=sys.stderr)
+            process = subprocess.Popen(command, cwd=EXAMPLE, env=env)
+            try:
+                wait_for_port(port, process)
+                rows += asyncio.run(
+                    run_server_scenarios(server, port, session_key, options)
+                )
+            finally:
+                process.terminate()
+                process.wait()
+    return rows
+
+
+def serve_wsgiref(port):
+    """Serves the example by the stdlib WSGI server with a thread per
+    request"""
+    from socketserver import ThreadingMixIn
+    from wsgiref.simple_server import WSGIRequestHandler, WSGIServer
+    from wsgiref.simple_server import make_server
+
+    from wsgi import application
+
+    class Server(ThreadingMixIn, WSGIServer):
+        daemon_threads = True
+
+    class Handler(WSGIRequestHandler):
+        def log_message(self, *args):
+            pass
+
+    make_server(HOST, port, application, Server, Handler).serve_forever()
+
+
+def setting(value):
+    name, _, value = value.partition("=")
+    try:
+        return name, json.loads(value)
+    except ValueError:
+        return name, value
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--server",
+        type=lambda value: value.split(","),
+        default=["uvicorn", "gunicorn"],
+        help="comma separated: " + ", ".join(SERVERS),
+    )
+    parser.add_argument("-k", help="only scenarios containing the substring")
+    parser.add_argument(
+        "--concurrency",
+        type=lambda value: [int(c) for c in value.split(",")],
+        default=[1, 8, 32, 128],
+        help="comma separated numbers of connections (1,8,32,128)",
+    )
+    parser.add_argument(
+        "--duration", type=float, default=2, help="seconds per step (2)"
+    )
+    parser.add_argument(
+        "--warmup", type=float, default=0.5, help="seconds per step (0.5)"
+    )
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument(
+        "--threads", type=int, default=8, help="threads of gunicorn workers"
+    )
+    parser.add_argument(
+        "--setting",
+        dest="settings",
+        type=setting,
+        action="append",
+        default=[],
+        metavar="NAME=JSON",
+        help="Django setting of the example, can be repeated",
+    )
+    parser.add_argument("--save", help="save results into a JSON file")
+    parser.add_argument("--serve-wsgiref", type=int, help=argparse.SUPPRESS)
+    options = parser.parse_args()
+    if options.serve_wsgiref:
+        return serve_wsgiref(options.serve_wsgiref)
+    options.settings = dict(options.settings)
+    for server in options.server:
+        if server not in SERVERS:
+            parser.error(f"Unknown server: {server}")
+        if server != "wsgiref" and importlib.util.find_spec(server) is None:
+            parser.error(f"{server} isn't installed")
+
+    rows = run(options)
+    report(rows)
+    if options.save:
+        Path(options.save).write_text(json.dumps(rows, indent=2))
+
+
+if __name__ == "__main__":
+    main()
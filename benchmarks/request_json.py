@@ -0,0 +1,79 @@
+"""Per-request overhead of attaching `request.json`
+
+Compares the current `_add_json_property` with the previous implementation,
+which created a new request subclass for every request.
+
+    python benchmarks/request_json.py
+"""
+
+import gc
+import sys
+import timeit
+from json import loads
+from pathlib import Path
+
+import django
+from django.conf import settings
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+settings.configure()
+django.setup()
+
+from django.core.exceptions import SuspiciousOperation  # noqa: E402
+from django.test import RequestFactory  # noqa: E402
+
+from raw_api import _add_json_property  # noqa: E402
+
+NUMBER = 100_000
+
+
+def _add_json_property_per_request_class(request):
+    """The previous implementation"""
+    cached = None
+
+    @property  # type: ignore
+    def json(self):
+        nonlocal cached
+        if cached is None:
+            try:
+                cached = loads(request.body.decode("utf-8"))
+            except Exception:
+                raise SuspiciousOperation("Invalid JSON")
+        return cached
+
+    @json.setter
+    def json(self, val):
+        nonlocal cached
+        cached = val
+
+    cls = type(request)
+    cls = type(cls.__name__, (cls,), {})
+    request.__class__ = cls
+    setattr(cls, "json", json)
+
+
+def bench(name, add_json_property):
+    factory = RequestFactory()
+    requests = [
+        factory.post("/", b'{"id": 1}', content_type="application/json")
+        for _ in range(NUMBER)
+    ]
+    it = iter(requests)
+
+    def attach_and_read():
+        request = next(it)
+        add_json_property(request)
+        return request.json
+
+    gc.collect()
+    total = timeit.timeit(attach_and_read, number=NUMBER)
+    classes = len({type(r) for r in requests})
+    print(
+        f"{name:<20} {total / NUMBER * 1e9:>8.0f} ns/request"
+        f"  {classes:>6} request classes"
+    )
+
+
+if __name__ == "__main__":
+    bench("per-request class", _add_json_property_per_request_class)
+    bench("cached class", _add_json_property)
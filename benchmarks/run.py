@@ -0,0 +1,321 @@
+"""Overhead of raw_api middleware, decorators and serialization
+
+Every benchmark calls a sync or async view in-process through `RequestFactory`
+/ `AsyncRequestFactory` requests, a new one per call built before the clock
+starts, and reports time per request and peak memory allocated while handling
+a request. Time is the best of a few repeats to reduce noise, memory is
+averaged over many requests.
+
+    python benchmarks/run.py                      # print results
+    python benchmarks/run.py -k validate_json     # only matching benchmarks
+    python benchmarks/run.py --save baseline.json
+    python benchmarks/run.py --compare baseline.json --threshold 0.2
+
+`--compare` exits with non-zero status if any benchmark got slower or uses
+more memory than the baseline by more than the threshold.
+"""
+
+import argparse
+import asyncio
+import json
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+import django
+from django.conf import settings
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+settings.configure(
+    INSTALLED_APPS=["django.contrib.auth", "django.contrib.contenttypes"],
+    DATA_UPLOAD_MAX_MEMORY_SIZE=None,
+)
+django.setup()
+
+from django.contrib.auth.models import AnonymousUser, User  # noqa: E402
+from django.test import AsyncRequestFactory, RequestFactory  # noqa: E402
+
+import raw_api  # noqa: E402
+
+MIN_TIME = 0.2
+MIN_ROUNDS = 5
+# Building requests takes longer than the fastest handlers, so they're built
+# in batches outside of the timed part and rounds are capped
+MAX_ROUNDS = 50_000
+BATCH_SIZE = 1000
+REPEATS = 3
+# Requests memory is averaged over, fewer if they're too slow
+MEMORY_ROUNDS = 100
+# Memory differences smaller than this aren't regressions, whatever the ratio
+MEMORY_TOLERANCE = 512
+
+
+def payload(items):
+    return {
+        "items": [
+            {"id": i, "name": f"item {i}", "price": i * 1.5, "tags": ["a"]}
+            for i in range(items)
+        ]
+    }
+
+
+PAYLOADS = {
+    "tiny": {"id": 1},
+    "1kb": payload(15),
+    "100kb": payload(1500),
+    "2mb": payload(30000),
+}
+
+ITEMS_SCHEMA = {
+    "items": [{"id": int, "name": str, "price": float, "tags": [str]}]
+}
+
+
+def sync_and_async(view):
+    async def async_view(request):
+        return view(request)
+
+    return view, async_view
+
+
+def bench_middleware(size, is_async):
+    data = PAYLOADS[size]
+    view = sync_and_async(lambda request: data)[is_async]
+    return raw_api.middleware(view), _requests(is_async, AnonymousUser())
+
+
+def bench_returns(size, is_async):
+    data = PAYLOADS[size]
+    schema = {"id": int} if size == "tiny" else ITEMS_SCHEMA
+    view = sync_and_async(lambda request: data)[is_async]
+    handler = raw_api.middleware(raw_api.returns(schema)(view))
+    return handler, _requests(is_async, AnonymousUser())
+
+
+def bench_process_response(size, is_async):
+    data = PAYLOADS[size]
+
+    def handler(request):
+        return raw_api._process_response(request, data)
+
+    return handler, _requests(is_async, AnonymousUser())
+
+
+def bench_validate_json(size, is_async):
+    data = PAYLOADS[size]
+    schema = {"id": int} if size == "tiny" else ITEMS_SCHEMA
+    view = sync_and_async(lambda request: request.json)[is_async]
+    handler = raw_api.validate_json(schema)(view)
+    factory = AsyncRequestFactory() if is_async else RequestFactory()
+    body = json.dumps(data)
+
+    def make_request():
+        request = factory.post("/", body, content_type="application/json")
+        raw_api._add_json_property(request)
+        return request
+
+    return handler, make_request
+
+
+def bench_validate_query(size, is_async):
+    view = sync_and_async(lambda request: request.query)[is_async]
+    handler = raw_api.validate_query({"id": int, "q?": str, "page?": int})(
+        view
+    )
+    return handler, _requests(is_async, AnonymousUser(), SEARCH_QUERY)
+
+
+def bench_validate_query_cached(size, is_async):
+    view = sync_and_async(lambda request: request.query)[is_async]
+    handler = raw_api.validate_query(
+        {"id": int, "q?": str, "page?": int}, cache_size=128
+    )(view)
+    return handler, _requests(is_async, AnonymousUser(), SEARCH_QUERY)
+
+
+SEARCH_QUERY = {"id": "1", "q": "search", "page": "2"}
+
+
+def bench_user_required(size, is_async):
+    view = sync_and_async(lambda request: request.user)[is_async]
+    handler = raw_api.user_required(view)
+    return handler, _requests(is_async, User(username="bench"))
+
+
+def bench_user_required_guest(size, is_async):
+    view = sync_and_async(lambda request: request.user)[is_async]
+    handler = raw_api.user_required(view)
+    return handler, _requests(is_async, AnonymousUser())
+
+
+def bench_stacked_decorators(size, is_async):
+    view = sync_and_async(lambda request: request.query)[is_async]
+    handler = raw_api.staff_required(raw_api.validate_query({"id": int})(view))
+    staff = User(username="bench", is_staff=True)
+    return handler, _requests(is_async, staff, {"id": "1"})
+
+
+def bench_endpoint(size, is_async):
+    view = sync_and_async(lambda request: request.query)[is_async]
+    handler = raw_api.endpoint(auth="staff", query={"id": int})(view)
+    staff = User(username="bench", is_staff=True)
+    return handler, _requests(is_async, staff, {"id": "1"})
+
+
+def _requests(is_async, user, query=None):
+    """Returns a function making a new GET request per call, so nothing
+    a handler caches on a request, like the loaded user, is reused
+
+    The user is set as `AuthenticationMiddleware` does, async code loads it
+    by `request.auser()`.
+    """
+    factory = AsyncRequestFactory() if is_async else RequestFactory()
+
+    async def auser():
+        return user
+
+    def make_request():
+        request = factory.get("/", query)
+        request.user = user
+        request.auser = auser
+        return request
+
+    return make_request
+
+
+BENCHMARKS = [
+    ("middleware", bench_middleware, list(PAYLOADS)),
+    ("returns", bench_returns, list(PAYLOADS)),
+    ("process_response", bench_process_response, list(PAYLOADS)),
+    ("validate_json", bench_validate_json, list(PAYLOADS)),
+    ("validate_query", bench_validate_query, ["tiny"]),
+    ("validate_query_cached", bench_validate_query_cached, ["tiny"]),
+    ("user_required", bench_user_required, ["tiny"]),
+    ("user_required_guest", bench_user_required_guest, ["tiny"]),
+    ("stacked_decorators", bench_stacked_decorators, ["tiny"]),
+    ("endpoint", bench_endpoint, ["tiny"]),
+]
+
+
+def measure(handler, make_request, is_async):
+    """Returns (ns per request, peak bytes allocated per request averaged
+    over up to `MEMORY_ROUNDS` requests)"""
+    if is_async:
+        loop = asyncio.new_event_loop()
+
+        async def run(requests):
+            for request in requests:
+                await handler(request)
+
+        def call(requests):
+            loop.run_until_complete(run(requests))
+
+    else:
+
+        def call(requests):
+            for request in requests:
+                handler(request)
+
+    def timed(rounds):
+        total = 0
+        for done in range(0, rounds, BATCH_SIZE):
+            size = min(BATCH_SIZE, rounds - done)
+            requests = [make_request() for _ in range(size)]
+            start = time.perf_counter_ns()
+            call(requests)
+            total += time.perf_counter_ns() - start
+        return total
+
+    call([make_request()])
+    rounds = MIN_ROUNDS
+    while rounds < MAX_ROUNDS and timed(rounds) < MIN_TIME * 1e9:
+        rounds *= 2
+    ns = min(timed(rounds) for _ in range(REPEATS)) / rounds
+
+    memory_rounds = min(rounds, MEMORY_ROUNDS)
+    total_peak = 0
+    tracemalloc.start()
+    for _ in range(memory_rounds):
+        requests = [make_request()]
+        tracemalloc.reset_peak()
+        base = tracemalloc.get_traced_memory()[0]
+        call(requests)
+        total_peak += tracemalloc.get_traced_memory()[1] - base
+    tracemalloc.stop()
+    if is_async:
+        loop.close()
+    return ns, total_peak // memory_rounds
+
+
+def run(pattern):
+    results = {}
+    for name, bench, sizes in BENCHMARKS:
+        for size in sizes:
+            for is_async in (False, True):
+                if name == "process_response" and is_async:
+                    continue
+                full_name = f"{'async_' if is_async else ''}{name}[{size}]"
+                if pattern and pattern not in full_name:
+                    continue
+                handler, make_request = bench(size, is_async)
+                ns, peak = measure(handler, make_request, is_async)
+                results[full_name] = {"ns": round(ns), "peak_bytes": peak}
+                print(
+                    f"{full_name:<36} {ns:>14,.0f} ns/request"
+                    f" {peak / 1024:>12,.1f} KiB peak"
+                )
+    return results
+
+
+def compare(results, baseline, threshold):
+    """Prints regressions of time and memory and returns their number"""
+    regressions = 0
+    for name, result in results.items():
+        if name not in baseline:
+            continue
+        ratio = result["ns"] / baseline[name]["ns"]
+        if ratio > 1 + threshold:
+            regressions += 1
+            print(f"REGRESSION {name}: {ratio:.2f}x slower than baseline")
+        peak, baseline_peak = (
+            result["peak_bytes"],
+            baseline[name]["peak_bytes"],
+        )
+        if (
+            peak > baseline_peak * (1 + threshold)
+            and peak - baseline_peak > MEMORY_TOLERANCE
+        ):
+            regressions += 1
+            print(
+                f"REGRESSION {name}: {peak / max(baseline_peak, 1):.2f}x"
+                " more memory than baseline"
+            )
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("-k", dest="pattern", help="run matching benchmarks")
+    parser.add_argument("--save", type=Path, help="save results as JSON")
+    parser.add_argument("--compare", type=Path, help="baseline JSON file")
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.2,
+        help="allowed slowdown or memory growth relative to the baseline, "
+        "0.2 is 20%%",
+    )
+    args = parser.parse_args()
+
+    results = run(args.pattern)
+    if args.save:
+        args.save.write_text(json.dumps(results, indent=4, sort_keys=True))
+    if args.compare:
+        baseline = json.loads(args.compare.read_text())
+        if compare(results, baseline, args.threshold):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
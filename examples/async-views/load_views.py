@@ -0,0 +1,172 @@
+"""Views exercising each raw_api decorator for `benchmarks/load.py`
+
+Every scenario has a sync and an async view with the same decorators and
+data, mounted as `/load/sync/<name>` and `/load/async/<name>`.
+"""
+
+from django.contrib.auth.models import User
+from django.urls import path
+
+from raw_api import (
+    cache_response,
+    coalesce,
+    endpoint,
+    etag,
+    rate_limit,
+    returns,
+    staff_required,
+    user_required,
+    validate_json,
+    validate_query,
+)
+
+ITEMS = [
+    {"id": i, "name": f"item {i}", "price": i * 1.5, "tags": ["a", "b"]}
+    for i in range(100)
+]
+ITEM = {"id": int, "name": str, "price": float, "tags": [str]}
+
+
+def plain(request):
+    return {"hello": "world"}
+
+
+async def async_plain(request):
+    return {"hello": "world"}
+
+
+def items(request):
+    return ITEMS
+
+
+async def async_items(request):
+    return ITEMS
+
+
+@returns([ITEM])
+def typed_items(request):
+    return ITEMS
+
+
+@returns([ITEM])
+async def async_typed_items(request):
+    return ITEMS
+
+
+def stream(request):
+    # Django takes a bare generator for a coroutine under ASGI on Python 3.11
+    return (item for item in ITEMS), 200
+
+
+async def async_stream(request):
+    for item in ITEMS:
+        yield item
+
+
+def queryset(request):
+    return User.objects.values("id", "username")
+
+
+async def async_queryset(request):
+    return User.objects.values("id", "username")
+
+
+@validate_query({"id": int})
+def query(request):
+    return request.query
+
+
+@validate_query({"id": int})
+async def async_query(request):
+    return request.query
+
+
+@validate_json({"id": int, "name": str, "tags": [str]})
+def json(request):
+    return request.json
+
+
+@validate_json({"id": int, "name": str, "tags": [str]})
+async def async_json(request):
+    return request.json
+
+
+@user_required
+def user(request):
+    return {"user": request.user.username}
+
+
+@user_required
+async def async_user(request):
+    return {"user": request.user.username}
+
+
+@staff_required
+@validate_query({"id": int})
+def stacked(request):
+    return request.query
+
+
+@staff_required
+@validate_query({"id": int})
+async def async_stacked(request):
+    return request.query
+
+
+@endpoint(auth="staff", query={"id": int})
+def fused(request):
+    return request.query
+
+
+@endpoint(auth="staff", query={"id": int})
+async def async_fused(request):
+    return request.query
+
+
+@validate_query({"id": int})
+@cache_response(60)
+def cached(request):
+    return ITEMS
+
+
+@validate_query({"id": int})
+@cache_response(60)
+async def async_cached(request):
+    return ITEMS
+
+
+@etag(version=lambda request: "1")
+def tagged(request):
+    return ITEMS
+
+
+@etag(version=lambda request: "1")
+async def async_tagged(request):
+    return ITEMS
+
+
+# Every request is counted, but none is rejected
+@rate_limit("1000000000/s")
+def limited(request):
+    return {"hello": "world"}
+
+
+@rate_limit("1000000000/s")
+async def async_limited(request):
+    return {"hello": "world"}
+
+
+@validate_query({"id": int})
+@coalesce()
+async def async_coalesced(request):
+    return ITEMS
+
+
+urlpatterns = []
+for _name, _view in list(globals().items()):
+    if callable(_view) and getattr(_view, "__module__", None) == __name__:
+        if _name.startswith("async_"):
+            _route = f"async/{_name[len('async_'):]}"
+        else:
+            _route = f"sync/{_name}"
+        urlpatterns.append(path(_route, _view))
@@ -1,6 +1,8 @@
+import json
+import os
 from pathlib import Path
 
-DEBUG = True
+DEBUG = os.environ.get("DEBUG", "1") == "1"
 SECRET_KEY = "foo"
 ROOT_URLCONF = "urls"
 INSTALLED_APPS = [
@@ -14,8 +16,10 @@ INSTALLED_APPS = [
 ]
 DATABASES = {
     "default": {
-        "ENGINE": "django.db.backends.postgresql_psycopg2",
-        "NAME": "django_raw_api_async",
+        "ENGINE": os.environ.get(
+            "DB_ENGINE", "django.db.backends.postgresql_psycopg2"
+        ),
+        "NAME": os.environ.get("DB_NAME", "django_raw_api_async"),
     }
 }
 MIDDLEWARE = [
@@ -44,6 +48,8 @@ TEMPLATES = [
     },
 ]
 STATIC_URL = "/static/"
+# Extra settings as a JSON object, e.g. `{"RAW_API_ETAGS": true}`
+globals().update(json.loads(os.environ.get("EXTRA_SETTINGS", "{}")))
 # LOGGING = {
 #     "version": 1,
 #     "disable_existing_loggers": False,
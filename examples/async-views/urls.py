@@ -1,6 +1,7 @@
 from django.contrib import admin
-from django.urls import path
+from django.urls import include, path
 
+import load_views
 import views
 
 urlpatterns = [
@@ -10,4 +11,5 @@ urlpatterns = [
     path("json", views.json),
     path("user", views.user),
     path("staff", views.staff),
+    path("load/", include(load_views)),
 ]
@@ -1,24 +1,24 @@
 import asyncio
+import os
 import uuid
 
 from django.shortcuts import render
 
 from raw_api import (
+    endpoint,
     staff_required,
     user_required,
     validate_json,
-    validate_query,
 )
 
-SLEEP = 1
+SLEEP = float(os.environ.get("SLEEP", 1))
 
 
 def index(request):
     return render(request, "index.html", {"sleep": SLEEP})
 
 
-@staff_required
-@validate_query({"id": int})
+@endpoint(auth="staff", query={"id": int})
 async def query(request):
     await sleep()
     return request.query
@@ -43,6 +43,8 @@ async def staff(request):
 
 
 async def sleep():
+    if not SLEEP:
+        return
     request_id = str(uuid.uuid4())
     print(f"{request_id=} fall asleep")
     await asyncio.sleep(SLEEP)
@@ -1,162 +1,946 @@
 import asyncio
-from functools import wraps
-from json import loads
+import dataclasses
+import hashlib
+import inspect
+import json
+import logging
+import math
+from concurrent.futures import ThreadPoolExecutor
+from collections.abc import Mapping
+from functools import lru_cache, partial, wraps
+from time import perf_counter_ns
+from types import MappingProxyType
 
 from asgiref.sync import sync_to_async
 from django.conf import settings
-from django.core.exceptions import SuspiciousOperation
-from django.http import HttpRequest, HttpResponse, JsonResponse
+from django.core.exceptions import PermissionDenied, SuspiciousOperation
+from django.db import close_old_connections
+from django.db.models.query import QuerySet
+from django.http import (
+    Http404,
+    HttpRequest,
+    HttpResponse,
+    HttpResponseBase,
+    QueryDict,
+    StreamingHttpResponse,
+)
+from django.urls import Resolver404, resolve
+from django.utils.cache import (
+    get_conditional_response,
+    patch_vary_headers,
+    quote_etag,
+    set_response_etag,
+)
 from django.utils.decorators import sync_and_async_middleware
+from django.utils.module_loading import import_string
+import trafaret as t
 from trafaret import DataError
 from trafaret.constructor import construct
 
-JSON_PARAMS = (
-    {"indent": 4, "ensure_ascii": False, "sort_keys": True}
-    if settings.DEBUG
-    else {}
+from . import compression, offload, serializers, streaming
+from .backends import get_backend
+from .cache import DjangoCacheStore, LRUStore  # noqa: F401
+from .codecs import get_codecs
+from .compiler import compile_encoder, compile_validator
+from .executor import ExecutorSaturated, SyncExecutor
+from .flight import Coalescer, InFlight
+from .limits import JsonLimits, check_body_size, check_data, check_json
+from .ratelimit import (  # noqa: F401
+    DjangoCacheRateStore,
+    TokenBucketStore,
+    parse_rate,
+)
+
+JSON_BACKEND = get_backend(getattr(settings, "RAW_API_JSON_BACKEND", "json"))
+CODECS = get_codecs(getattr(settings, "RAW_API_CODECS", ()))
+COMPILE_VALIDATORS = getattr(settings, "RAW_API_COMPILE_VALIDATORS", True)
+CACHE_SIZE = getattr(settings, "RAW_API_CACHE_SIZE", 32 * 1024 * 1024)
+ETAGS = getattr(settings, "RAW_API_ETAGS", False)
+COMPRESS = getattr(settings, "RAW_API_COMPRESS", False)
+COMPRESS_MIN_SIZE = getattr(settings, "RAW_API_COMPRESS_MIN_SIZE", 1024)
+COMPRESS_LEVEL = getattr(settings, "RAW_API_COMPRESS_LEVEL", 6)
+TIMING = getattr(settings, "RAW_API_TIMING", False)
+TIMING_CALLBACK = getattr(settings, "RAW_API_TIMING_CALLBACK", None)
+if isinstance(TIMING_CALLBACK, str):
+    TIMING_CALLBACK = import_string(TIMING_CALLBACK)
+MAX_BODY_SIZE = getattr(settings, "RAW_API_MAX_BODY_SIZE", None)
+MAX_JSON_DEPTH = getattr(settings, "RAW_API_MAX_JSON_DEPTH", None)
+MAX_JSON_KEYS = getattr(settings, "RAW_API_MAX_JSON_KEYS", None)
+MAX_JSON_STRING_LENGTH = getattr(
+    settings, "RAW_API_MAX_JSON_STRING_LENGTH", None
+)
+PATHS = getattr(settings, "RAW_API_PATHS", None)
+if PATHS is not None:
+    PATHS = tuple(PATHS)
+BATCH_MAX_ITEMS = getattr(settings, "RAW_API_BATCH_MAX_ITEMS", 20)
+BATCH_THREADS = getattr(settings, "RAW_API_BATCH_THREADS", 4)
+SYNC_THREADS = getattr(settings, "RAW_API_SYNC_THREADS", 4)
+SYNC_THREAD_SENSITIVE = getattr(
+    settings, "RAW_API_SYNC_THREAD_SENSITIVE", True
 )
+SYNC_MAX_QUEUE = getattr(settings, "RAW_API_SYNC_MAX_QUEUE", None)
+OFFLOAD_SIZE = getattr(settings, "RAW_API_OFFLOAD_SIZE", 1024 * 1024)
+OFFLOAD_THREADS = getattr(settings, "RAW_API_OFFLOAD_THREADS", 2)
+
+logger = logging.getLogger(__name__)
 
 
 @sync_and_async_middleware
 def middleware(get_response):
-    """Adds `request.json` attribute and encodes str / dict responses"""
+    """Adds `request.json` attribute and encodes str / dict / generator
+    responses
+
+    With `RAW_API_PATHS` requests to other paths are passed through as is
+    """
 
     if asyncio.iscoroutinefunction(get_response):
 
         async def raw_api_middleware(request):
+            if PATHS is not None and not request.path_info.startswith(PATHS):
+                return await get_response(request)
             _add_json_property(request)
-            response = await get_response(request)
-            return _process_response(response)
+            if TIMING:
+                request._raw_api_timings = {}
+                start = perf_counter_ns()
+                response = await get_response(request)
+                response = await _afetch_queryset(response)
+                response = await _atimed_finalize_response(
+                    request, response, start
+                )
+                return _to_async_streaming(request, response)
+            response = await _afetch_queryset(await get_response(request))
+            response = await _afinalize_response(request, response)
+            return _to_async_streaming(request, response)
 
     else:
 
         def raw_api_middleware(request):
+            if PATHS is not None and not request.path_info.startswith(PATHS):
+                return get_response(request)
             _add_json_property(request)
-            response = get_response(request)
-            return _process_response(response)
+            if TIMING:
+                request._raw_api_timings = {}
+                start = perf_counter_ns()
+                response = get_response(request)
+                return _timed_finalize_response(request, response, start)
+            return _finalize_response(request, get_response(request))
 
+    raw_api_middleware.process_exception = _process_exception
     return raw_api_middleware
 
 
-def _process_response(response):
+def _process_exception(request, exception):
+    if isinstance(exception, ExecutorSaturated):
+        return _saturated_error_response
+    return None
+
+
+_saturated_error_response = {"message": "Service unavailable"}, 503
+
+
+def _to_async_streaming(request, response):
+    """Makes sync streaming responses pull their chunks one by one in
+    `sync_executor`, Django would consume the whole iterator at once under
+    ASGI"""
+    if isinstance(response, StreamingHttpResponse) and not response.is_async:
+        response.streaming_content = streaming.aiter_in_thread(
+            response.streaming_content, partial(run_sync, request)
+        )
+    return response
+
+
+async def _afinalize_response(request, response):
+    """Finalizes a response of an async view in a thread if it's large"""
+    if _is_large_result(response):
+        return await _offload(_finalize_large_response, request, response)
+    return _finalize_response(request, response)
+
+
+async def _atimed_finalize_response(request, response, start):
+    if _is_large_result(response):
+        return await _offload(
+            _timed_finalize_response,
+            request,
+            response,
+            start,
+            _finalize_large_response,
+        )
+    return _timed_finalize_response(request, response, start)
+
+
+def _finalize_large_response(request, response):
+    """Encodes large JSON in parts, so the event loop takes the GIL back
+    between them"""
+    data, status = _split_status(response)
+    if isinstance(data, (dict, list)):
+        response = _data_response(request, data, status, large=True)
+    return _finalize_response(request, response)
+
+
+def _is_large_result(result):
+    """Returns if a view result is larger than `RAW_API_OFFLOAD_SIZE`:
+    data is estimated and responses are measured if they're post-processed"""
+    if OFFLOAD_SIZE is None:
+        return False
+    data, _ = _split_status(result)
+    if isinstance(data, (dict, list)):
+        return offload.estimate_size(data) > OFFLOAD_SIZE
+    if isinstance(data, HttpResponse) and (ETAGS or COMPRESS):
+        return len(data.content) > OFFLOAD_SIZE
+    return False
+
+
+def _is_large_body(request):
+    body = request.__dict__.get("_body")
+    if body is not None:
+        size = len(body)
+    else:
+        try:
+            size = int(request.META.get("CONTENT_LENGTH") or 0)
+        except ValueError:
+            size = 0
+    return OFFLOAD_SIZE is not None and size > OFFLOAD_SIZE
+
+
+async def _offload(func, *args):
+    """Runs CPU-bound `func` in a thread keeping the event loop responsive"""
+    global _offload_executor
+    if _offload_executor is None:
+        _offload_executor = ThreadPoolExecutor(
+            OFFLOAD_THREADS, thread_name_prefix="raw_api_offload"
+        )
+    return await asyncio.get_running_loop().run_in_executor(
+        _offload_executor, func, *args
+    )
+
+
+_offload_executor = None
+
+
+def _finalize_response(request, response):
+    response = _process_response(request, response)
+    if ETAGS:
+        response = _conditional_response(request, response)
+    if COMPRESS:
+        response = _compress_response(request, response)
+    return response
+
+
+def _timed_finalize_response(
+    request, response, start, finalize=_finalize_response
+):
+    """Finalizes response recording time of the view and serialization, then
+    reports all the recorded stages"""
+    timings = request._raw_api_timings
+    view_end = perf_counter_ns()
+    timings["view"] = (
+        view_end
+        - start
+        - timings.get("parse", 0)
+        - timings.get("validation", 0)
+        - timings.get("sync_wait", 0)
+        - timings.get("sync_run", 0)
+    )
+    response = finalize(request, response)
+    end = perf_counter_ns()
+    timings["serialization"] = end - view_end
+    timings["total"] = end - start
+    response["Server-Timing"] = ", ".join(
+        f"{stage};dur={ns / 1e6:.3f}" for stage, ns in timings.items()
+    )
+    if TIMING_CALLBACK is not None:
+        TIMING_CALLBACK(request, timings)
+    return response
+
+
+def _record_timing(request, stage, start):
+    """Adds time passed since `start` to a stage of request timings"""
+    timings = request.__dict__.get("_raw_api_timings")
+    if timings is not None:
+        timings[stage] = timings.get(stage, 0) + perf_counter_ns() - start
+
+
+def _process_response(request, response):
+    data, status = _split_status(response)
+    if isinstance(data, str):
+        return HttpResponse(data, status=status, content_type="text/plain")
+    elif isinstance(data, (dict, list)):
+        return _data_response(request, data, status)
+    elif isinstance(data, QuerySet):
+        rows = serializers.queryset_rows(data)
+        return _data_response(request, rows, status)
+    elif dataclasses.is_dataclass(data) and not isinstance(data, type):
+        return _data_response(request, data, status)
+    elif inspect.isgenerator(data) or inspect.isasyncgen(data):
+        return _streaming_response(request, data, status)
+    return response
+
+
+async def _afetch_queryset(response):
+    """Fetches a QuerySet returned by an async view, as is or as a value of
+    a dict, without blocking the event loop"""
+    data, status = _split_status(response)
+    if isinstance(data, QuerySet):
+        return await serializers.aqueryset_rows(data), status
+    if isinstance(data, dict) and any(
+        isinstance(value, QuerySet) for value in data.values()
+    ):
+        return {
+            key: (
+                await serializers.aqueryset_rows(value)
+                if isinstance(value, QuerySet)
+                else value
+            )
+            for key, value in data.items()
+        }, status
+    return response
+
+
+def _split_status(response):
+    """Returns data and status of a view result"""
     if (
         isinstance(response, tuple)
         and len(response) == 2
         and isinstance(response[1], int)
     ):
-        data, status = response
+        return response
+    return response, 200
+
+
+def _data_response(request, data, status=200, large=False):
+    """Encodes data as JSON or in a format of a codec the client prefers,
+    `large` compact JSON is encoded in parts"""
+    codec = _response_codec(request)
+    if codec is None:
+        pretty = _wants_pretty_json(request)
+        if large and not pretty:
+            content = offload.dumps_in_parts(_compact_json_dumps, data)
+        else:
+            content = JSON_BACKEND.dumps(data, pretty)
+        response = HttpResponse(
+            content, status=status, content_type="application/json"
+        )
     else:
-        data, status = response, 200
+        response = HttpResponse(
+            codec.dumps(data), status=status, content_type=codec.content_type
+        )
+    if CODECS:
+        patch_vary_headers(response, ("Accept",))
+    return response
 
-    if isinstance(data, str):
-        return HttpResponse(data, status=status, content_type="text/plain")
-    elif isinstance(data, dict):
-        return JsonResponse(data, status=status, json_dumps_params=JSON_PARAMS)
+
+def _compact_json_dumps(data):
+    return JSON_BACKEND.dumps(data, False)
+
+
+def _is_stdlib_backend():
+    return getattr(JSON_BACKEND, "stdlib", False)
+
+
+def _response_codec(request):
+    """Returns a codec the client accepts rather than JSON or `None`"""
+    if not CODECS:
+        return None
+    for media_type in _accepted_media_types(request.headers.get("Accept", "")):
+        codec = CODECS.get(media_type)
+        if codec is not None:
+            return codec
+        if media_type in _JSON_MEDIA_TYPES:
+            return None
+    return None
+
+
+_JSON_MEDIA_TYPES = ("application/json", "application/*", "*/*")
+
+
+@lru_cache(maxsize=256)
+def _accepted_media_types(accept):
+    """Media types of `Accept` header value ordered by their quality"""
+    qualities = []
+    for item in accept.split(","):
+        media_type, _, params = item.partition(";")
+        quality = 1.0
+        for param in params.split(";"):
+            name, _, value = param.partition("=")
+            if name.strip() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0
+        if quality > 0:
+            qualities.append((quality, media_type.strip().lower()))
+    qualities.sort(key=lambda item: item[0], reverse=True)
+    return tuple(media_type for _, media_type in qualities)
+
+
+def _request_codec(request):
+    """Returns a codec of the request body or `None` for JSON"""
+    if not CODECS:
+        return None
+    return _get_codec(request.META.get("CONTENT_TYPE", ""))
+
+
+def _get_codec(content_type):
+    return CODECS.get(content_type.partition(";")[0].strip().lower())
+
+
+def _streaming_response(request, items, status):
+    """Streams generator items as NDJSON if the client accepts it or as
+    a JSON array otherwise"""
+    if streaming.NDJSON_CONTENT_TYPE in request.headers.get("Accept", ""):
+        content_type = streaming.NDJSON_CONTENT_TYPE
+        encode = (
+            streaming.andjson_chunks
+            if inspect.isasyncgen(items)
+            else streaming.ndjson_chunks
+        )
+    else:
+        content_type = "application/json"
+        encode = (
+            streaming.ajson_array_chunks
+            if inspect.isasyncgen(items)
+            else streaming.json_array_chunks
+        )
+    return StreamingHttpResponse(
+        encode(items, JSON_BACKEND.dumps),
+        status=status,
+        content_type=content_type,
+    )
+
+
+def _conditional_response(request, response):
+    """Adds `ETag` header to successful GET responses and turns them into
+    304 if the client already has the same content"""
+    if (
+        request.method not in ("GET", "HEAD")
+        or response.status_code != 200
+        or response.streaming
+    ):
+        return response
+    if not response.has_header("ETag"):
+        set_response_etag(response)
+    return get_conditional_response(
+        request, etag=response.get("ETag"), response=response
+    )
+
+
+def _compress_response(request, response):
+    """Gzips JSON and text responses if they're large enough and the client
+    accepts it, streaming responses are compressed chunk by chunk"""
+    content_type = response.get("Content-Type", "")
+    if response.has_header("Content-Encoding") or not (
+        content_type.startswith(_COMPRESSIBLE_CONTENT_TYPES)
+    ):
+        return response
+    if not response.streaming and len(response.content) < COMPRESS_MIN_SIZE:
+        return response
+    patch_vary_headers(response, ("Accept-Encoding",))
+    if not compression.accepts_gzip(
+        request.headers.get("Accept-Encoding", "")
+    ):
+        return response
+
+    if response.streaming:
+        if getattr(response, "is_async", False):
+            response.streaming_content = compression.agzip_chunks(
+                response.streaming_content, COMPRESS_LEVEL
+            )
+        else:
+            response.streaming_content = compression.gzip_chunks(
+                response.streaming_content, COMPRESS_LEVEL
+            )
+    else:
+        compressed = compression.gzip_bytes(response.content, COMPRESS_LEVEL)
+        if len(compressed) >= len(response.content):
+            return response
+        response.content = compressed
+        response["Content-Length"] = str(len(compressed))
+
+    etag = response.get("ETag")
+    if etag and etag.startswith('"'):
+        response["ETag"] = "W/" + etag
+    response["Content-Encoding"] = "gzip"
     return response
 
 
+_COMPRESSIBLE_CONTENT_TYPES = (
+    "application/json",
+    streaming.NDJSON_CONTENT_TYPE,
+    "text/",
+)
+
+
+def _wants_pretty_json(request: HttpRequest) -> bool:
+    """Pretty-prints if it's asked by `Accept: application/json; indent=4`
+    or if it's a browser request in debug mode"""
+    accept = request.headers.get("Accept", "")
+    if "indent=" in accept:
+        return True
+    return settings.DEBUG and "text/html" in accept
+
+
 def _add_json_property(request: HttpRequest) -> None:
-    """Adds `json` property into a request"""
-    cached = None
+    """Adds `json` property into a request
+
+    The property lives on a subclass of the request type which is created once
+    per concrete request class, so there are no per-request allocations
+    """
+    cls = type(request)
+    try:
+        request.__class__ = _json_classes[cls]
+    except KeyError:
+        if isinstance(request, _JsonRequestMixin):
+            return
+        request.__class__ = _json_classes[cls] = type(
+            cls.__name__, (_JsonRequestMixin, cls), {}
+        )
+
 
-    @property  # type: ignore
+class _JsonRequestMixin:
+    @property
     def json(self):
-        nonlocal cached
-        if cached is None:
-            try:
-                cached = loads(request.body.decode("utf-8"))
-            except Exception:
-                raise SuspiciousOperation("Invalid JSON")
-        return cached
+        try:
+            return self._raw_api_json
+        except AttributeError:
+            pass
+        return self._load_json()
+
+    def _load_json(self, large=False):
+        """Parses the body, `large` JSON arrays and objects are parsed item
+        by item with the stdlib backend"""
+        codec = _request_codec(self)
+        if TIMING:
+            start = perf_counter_ns()
+        try:
+            if codec is None:
+                if large and _is_stdlib_backend():
+                    self._raw_api_json = offload.loads_in_parts(self.body)
+                else:
+                    self._raw_api_json = JSON_BACKEND.loads(self.body)
+            else:
+                self._raw_api_json = codec.loads(self.body)
+        except Exception:
+            raise SuspiciousOperation(
+                "Invalid JSON"
+                if codec is None
+                else f"Invalid {codec.content_type} body"
+            )
+        finally:
+            if TIMING:
+                _record_timing(self, "parse", start)
+        return self._raw_api_json
 
     @json.setter
     def json(self, val):
-        nonlocal cached
-        cached = val
+        self._raw_api_json = val
+
+    async def ajson(self):
+        """Returns `json` parsing bodies larger than `RAW_API_OFFLOAD_SIZE`
+        in a thread"""
+        try:
+            return self._raw_api_json
+        except AttributeError:
+            pass
+        if _is_large_body(self):
+            return await _offload(self._load_json, True)
+        return self.json
+
+    @property
+    def json_stream(self):
+        """Iterates over items of a top-level JSON array or `(key, value)`
+        pairs of an object reading them directly from the request stream"""
+        try:
+            return self._raw_api_json_stream
+        except AttributeError:
+            pass
+        self._raw_api_json_stream = _iter_request_json(self)
+        return self._raw_api_json_stream
+
+    @json_stream.setter
+    def json_stream(self, val):
+        self._raw_api_json_stream = val
 
-    cls = type(request)
-    cls = type(cls.__name__, (cls,), {})
-    request.__class__ = cls
-    setattr(cls, "json", json)
 
+def _iter_request_json(request):
+    try:
+        yield from streaming.iter_json(request.read)
+    except ValueError:
+        raise SuspiciousOperation("Invalid JSON")
+
+
+_json_classes: dict = {}
 
-def validate_json(validator):
-    validate = construct(validator)
+
+def endpoint(auth=None, query=None, json=None, methods=None):
+    """Combines checks of the method, `@user_required` (`auth="user"`) or
+    `@staff_required` (`auth="staff"`), `@validate_query` and
+    `@validate_json` in a single wrapper
+
+    Responses and the order of checks are the same as of the stacked
+    decorators.
+    """
+    if auth not in (None, "user", "staff"):
+        raise ValueError(f"Invalid auth: {auth!r}")
+    staff = auth == "staff"
+    if methods is not None:
+        methods = frozenset(method.upper() for method in methods)
+    validate_query = None if query is None else _construct(query)
+    validate_json = None if json is None else _construct(json)
+    limits = JsonLimits(
+        MAX_BODY_SIZE, MAX_JSON_DEPTH, MAX_JSON_KEYS, MAX_JSON_STRING_LENGTH
+    )
+    if limits == JsonLimits():
+        limits = None
 
     def decorator(f):
         if asyncio.iscoroutinefunction(f):
 
             async def wrapper(request, *args, **kwargs):
-                return _get_json_error(validate, request) or await f(
-                    request, *args, **kwargs
-                )
+                if methods is not None and request.method not in methods:
+                    return _method_error_response
+                if auth is not None:
+                    user = await _aget_user(request)
+                    if not user.is_authenticated:
+                        return _user_error_response
+                    if staff and not user.is_staff:
+                        return _staff_error_response
+                if validate_query is not None:
+                    error = _get_query_error(validate_query, request)
+                    if error:
+                        return error
+                if validate_json is not None:
+                    error = await _aget_json_error(
+                        validate_json, request, limits
+                    )
+                    if error:
+                        return error
+                return await f(request, *args, **kwargs)
 
         else:
 
             def wrapper(request, *args, **kwargs):
-                return _get_json_error(validate, request) or f(
-                    request, *args, **kwargs
-                )
+                if methods is not None and request.method not in methods:
+                    return _method_error_response
+                if auth is not None:
+                    user = request.user
+                    if not user.is_authenticated:
+                        return _user_error_response
+                    if staff and not user.is_staff:
+                        return _staff_error_response
+                if validate_query is not None:
+                    error = _get_query_error(validate_query, request)
+                    if error:
+                        return error
+                if validate_json is not None:
+                    error = _get_json_error(validate_json, request, limits)
+                    if error:
+                        return error
+                return f(request, *args, **kwargs)
+
+        return wraps(f)(wrapper)
+
+    return decorator
+
+
+def validate_json(
+    validator,
+    stream=False,
+    max_body_size=MAX_BODY_SIZE,
+    max_depth=MAX_JSON_DEPTH,
+    max_keys=MAX_JSON_KEYS,
+    max_string_length=MAX_JSON_STRING_LENGTH,
+):
+    """Validates `request.json` or, with `stream=True`, each item of
+    `request.json_stream` as it's read
+
+    Bodies are checked against the limits before they're parsed: the size is
+    checked by `Content-Length` header even before reading, others don't
+    apply to streams.
+    """
+    validate = _construct(validator)
+    get_error = _get_json_stream_error if stream else _get_json_error
+    aget_error = _aget_json_stream_error if stream else _aget_json_error
+    limits = JsonLimits(max_body_size, max_depth, max_keys, max_string_length)
+    if limits == JsonLimits():
+        limits = None
+
+    def decorator(f):
+        if asyncio.iscoroutinefunction(f):
+
+            async def wrapper(request, *args, **kwargs):
+                try:
+                    return await aget_error(
+                        validate, request, limits
+                    ) or await f(request, *args, **kwargs)
+                except _StreamItemError as e:
+                    return _stream_item_error_response(e)
+
+        else:
+
+            def wrapper(request, *args, **kwargs):
+                try:
+                    return get_error(validate, request, limits) or f(
+                        request, *args, **kwargs
+                    )
+                except _StreamItemError as e:
+                    return _stream_item_error_response(e)
 
         return wraps(f)(wrapper)
 
     return decorator
 
 
-def _get_json_error(validate, request):
+def _get_json_error(validate, request, limits=None, large=False):
     """Returns `None` or an error response"""
     if request.method not in ["POST", "PATCH"]:
-        return {"message": "Method not allowed"}, 405
+        return _method_error_response
+    if limits is not None:
+        error = _get_limits_error(request, limits, stream=False)
+        if error:
+            return error
+    if large and not hasattr(request, "_raw_api_json"):
+        request._load_json(large=True)
     try:
-        request.json = validate(request.json)
+        request.json = _validate(validate, request, request.json)
     except DataError as e:
         return _data_error_response(e)
     return None
 
 
-def validate_query(validator):
-    validate = construct(validator)
+async def _aget_json_error(validate, request, limits=None):
+    """Async version of `_get_json_error`, large bodies are read, parsed and
+    validated in a thread"""
+    if _is_large_body(request) and request.method in ["POST", "PATCH"]:
+        return await _offload(_get_json_error, validate, request, limits, True)
+    return _get_json_error(validate, request, limits)
+
+
+async def _aget_json_stream_error(validate, request, limits=None):
+    return _get_json_stream_error(validate, request, limits)
+
+
+def _get_json_stream_error(validate, request, limits=None):
+    """Returns `None` or an error response, items are validated lazily"""
+    if request.method not in ["POST", "PATCH"]:
+        return _method_error_response
+    if limits is not None:
+        error = _get_limits_error(request, limits, stream=True)
+        if error:
+            return error
+    request.json_stream = _validate_stream(validate, request.json_stream)
+    return None
+
+
+_method_error_response = {"message": "Method not allowed"}, 405
+
+
+def _get_limits_error(request, limits, stream):
+    """Returns `None` or an error response if the body exceeds limits"""
+    try:
+        content_length = int(request.META.get("CONTENT_LENGTH") or 0)
+    except ValueError:
+        content_length = None
+    error = check_body_size(limits, content_length)
+    if error:
+        return {"message": "Payload too large", "errors": error}, 413
+    if stream:
+        return None
+    body = request.body
+    error = check_body_size(limits, len(body))
+    if error:
+        return {"message": "Payload too large", "errors": error}, 413
+    if _request_codec(request) is not None:
+        error = check_data(limits, request.json)
+    else:
+        error = check_json(limits, body)
+    if error:
+        return {"message": "Bad request", "errors": error}, 400
+    return None
+
+
+def _validate_stream(validate, items):
+    for index, item in enumerate(items):
+        if isinstance(item, tuple):
+            key, value = item
+            try:
+                yield key, validate(value)
+            except DataError as e:
+                raise _StreamItemError(key, e)
+        else:
+            try:
+                yield validate(item)
+            except DataError as e:
+                raise _StreamItemError(index, e)
+
+
+class _StreamItemError(Exception):
+    """Raised from a validated `request.json_stream` to be turned into an
+    error response by `@validate_json`"""
+
+    def __init__(self, key, error: DataError):
+        super().__init__(key, error)
+        self.key = key
+        self.error = error
+
+
+def _stream_item_error_response(e: _StreamItemError):
+    return {
+        "message": "Bad request",
+        "errors": {e.key: e.error.as_dict()},
+    }, 400
+
+
+def validate_query(validator, cache_size=0):
+    """Validates `request.GET` into `request.query`
+
+    With `cache_size` results of the last distinct query strings, including
+    error responses, are kept in an LRU cache. `request.query` is read-only
+    then and the view gets `cache_info()` and `cache_clear()` functions of
+    the cache, the same as `functools.lru_cache` ones.
+    """
+    validate = _construct(validator)
+    validate_query_string = (
+        lru_cache(cache_size)(partial(_validate_query_string, validate))
+        if cache_size
+        else None
+    )
 
     def decorator(f):
         if asyncio.iscoroutinefunction(f):
 
             async def wrapper(request, *args, **kwargs):
-                return _get_query_error(validate, request) or await f(
-                    request, *args, **kwargs
-                )
+                return _get_query_error(
+                    validate, request, validate_query_string
+                ) or await f(request, *args, **kwargs)
 
         else:
 
             def wrapper(request, *args, **kwargs):
-                return _get_query_error(validate, request) or f(
-                    request, *args, **kwargs
-                )
+                return _get_query_error(
+                    validate, request, validate_query_string
+                ) or f(request, *args, **kwargs)
 
-        return wraps(f)(wrapper)
+        wrapper = wraps(f)(wrapper)
+        if validate_query_string is not None:
+            wrapper.cache_info = validate_query_string.cache_info
+            wrapper.cache_clear = validate_query_string.cache_clear
+        return wrapper
 
     return decorator
 
 
-def _get_query_error(validate, request):
+def _construct(validator):
+    """Builds a validator for `@validate_json` and `@validate_query`"""
+    if COMPILE_VALIDATORS:
+        return compile_validator(validator)
+    return construct(validator)
+
+
+def _get_query_error(validate, request, validate_query_string=None):
     """Returns `None` or an error response"""
+    if validate_query_string is not None:
+        query, error = validate_query_string(
+            request.META.get("QUERY_STRING", "")
+        )
+        if error is None:
+            request.query = query
+        return error
     try:
-        request.query = validate(request.GET)
+        request.query = _validate(validate, request, request.GET)
     except DataError as e:
         return _data_error_response(e)
     return None
 
 
+def _validate_query_string(validate, query_string):
+    """Returns read-only validated query and `None` or `None` and an error
+    response"""
+    try:
+        return MappingProxyType(validate(QueryDict(query_string))), None
+    except DataError as e:
+        return None, _data_error_response(e)
+
+
+def _validate(validate, request, data):
+    if not TIMING:
+        return validate(data)
+    start = perf_counter_ns()
+    try:
+        return validate(data)
+    finally:
+        _record_timing(request, "validation", start)
+
+
 def _data_error_response(e: DataError):
     return {"message": "Bad request", "errors": e.as_dict()}, 400
 
 
+def returns(schema, check=True):
+    """Encodes successful dict and list results of the view by a JSON encoder
+    compiled for the schema of `validate_json` syntax
+
+    The encoder is used with the default `json` backend for compact JSON
+    responses, others are encoded as usual. In DEBUG mode with `check` results
+    are validated by the schema and `DataError` is raised if they don't
+    match.
+    """
+    encode = compile_encoder(schema, _compact_json_encoder.encode)
+    validate = _construct(schema) if check else None
+
+    def decorator(f):
+        if asyncio.iscoroutinefunction(f):
+
+            async def wrapper(request, *args, **kwargs):
+                result = await f(request, *args, **kwargs)
+                if _is_large_result(result):
+                    return await _offload(
+                        _encode_result, request, result, encode, validate
+                    )
+                return _encode_result(request, result, encode, validate)
+
+        else:
+
+            def wrapper(request, *args, **kwargs):
+                return _encode_result(
+                    request, f(request, *args, **kwargs), encode, validate
+                )
+
+        return wraps(f)(wrapper)
+
+    return decorator
+
+
+# Encodes the same way as `json` backend
+_compact_json_encoder = json.JSONEncoder(
+    default=serializers.default, separators=(",", ":")
+)
+
+
+def _encode_result(request, result, encode, validate):
+    data, status = _split_status(result)
+    if not isinstance(data, (dict, list)) or not 200 <= status < 300:
+        return result
+    if validate is not None and settings.DEBUG:
+        validate(data)
+    if (
+        not _is_stdlib_backend()
+        or _response_codec(request) is not None
+        or _wants_pretty_json(request)
+    ):
+        return result
+    response = HttpResponse(
+        encode(data), status=status, content_type="application/json"
+    )
+    if CODECS:
+        patch_vary_headers(response, ("Accept",))
+    return response
+
+
 def user_required(f):
     if asyncio.iscoroutinefunction(f):
 
         async def wrapper(request, *args, **kwargs):
-            if not await sync_to_async(getattr)(
-                request.user, "is_authenticated"
-            ):
+            if not (await _aget_user(request)).is_authenticated:
                 return _user_error_response
             return await f(request, *args, **kwargs)
 
@@ -177,10 +961,15 @@ def staff_required(f):
     if asyncio.iscoroutinefunction(f):
 
         async def wrapper(request, *args, **kwargs):
-            if not request.user.is_staff:
+            user = await _aget_user(request)
+            if not user.is_authenticated:
+                return _user_error_response
+            if not user.is_staff:
                 return _staff_error_response
             return await f(request, *args, **kwargs)
 
+        return wraps(f)(wrapper)
+
     else:
 
         def wrapper(request, *args, **kwargs):
@@ -192,3 +981,655 @@ def staff_required(f):
 
 
 _staff_error_response = {"message": "Staff member required"}, 403
+
+
+async def _aget_user(request):
+    """Loads the user in async context and replaces lazy `request.user` with
+    it, so it can be used in async views directly
+
+    It uses native `request.auser()` of Django 5+ unless the executor of
+    sync work is configured, then the user is loaded in it in a single call
+    """
+    try:
+        return request._raw_api_user
+    except AttributeError:
+        pass
+    auser = getattr(request, "auser", None)
+    if (
+        auser is not None
+        and sync_executor.thread_sensitive
+        and sync_executor.max_queue is None
+    ):
+        user = await auser()
+    else:
+        user = await run_sync(request, _get_user, request)
+    request._raw_api_user = request.user = user
+    return user
+
+
+def _get_user(request):
+    user = request.user
+    # Evaluates `SimpleLazyObject` set by `AuthenticationMiddleware`
+    user.is_authenticated
+    return getattr(user, "_wrapped", user)
+
+
+sync_executor = SyncExecutor(
+    SYNC_THREADS, SYNC_THREAD_SENSITIVE, SYNC_MAX_QUEUE
+)
+
+
+async def run_sync(request, func, *args, **kwargs):
+    """Runs sync `func` from an async view in `sync_executor`
+
+    Its queue wait and run times are reported as `sync_wait` and `sync_run`
+    stages with `RAW_API_TIMING`. If the queue is full, the request gets 503.
+    """
+    return await sync_executor.run(
+        func,
+        *args,
+        timings=request.__dict__.get("_raw_api_timings"),
+        **kwargs,
+    )
+
+
+async def _acall(request, func, *args, **kwargs):
+    """Calls a callback of a decorator from an async view, sync ones run in
+    `sync_executor` as they may block"""
+    if asyncio.iscoroutinefunction(func):
+        return await func(*args, **kwargs)
+    result = await run_sync(request, func, *args, **kwargs)
+    if inspect.isawaitable(result):
+        result = await result
+    return result
+
+
+def rate_limit(rate, key="user", store=None):
+    """Limits requests to a view by `rate` like `"100/m"`, other requests
+    get 429 with `Retry-After` header
+
+    Requests are counted per user (anonymous ones per IP address) with
+    `key="user"`, per IP address with `key="ip"` or per a string returned by
+    `key(request)` callback (it can be async for async views, sync ones run
+    in the executor of sync work there), `None` means no limit. The store is
+    an in-process token bucket store shared by all views by default.
+    """
+    count, period = parse_rate(rate)
+    if key not in ("user", "ip") and not callable(key):
+        raise ValueError(f"Invalid rate limit key: {key!r}")
+
+    def decorator(f):
+        prefix = f"raw_api:{f.__module__}.{f.__qualname__}"
+
+        if asyncio.iscoroutinefunction(f):
+
+            async def wrapper(request, *args, **kwargs):
+                client = await _arate_limit_key(request, key)
+                if client is not None:
+                    wait = await (store or _default_rate_store).ahit(
+                        f"{prefix}:{client}", count, period
+                    )
+                    if wait:
+                        return _rate_limit_response(request, wait)
+                return await f(request, *args, **kwargs)
+
+        else:
+
+            def wrapper(request, *args, **kwargs):
+                client = _rate_limit_key(request, key)
+                if client is not None:
+                    wait = (store or _default_rate_store).hit(
+                        f"{prefix}:{client}", count, period
+                    )
+                    if wait:
+                        return _rate_limit_response(request, wait)
+                return f(request, *args, **kwargs)
+
+        return wraps(f)(wrapper)
+
+    return decorator
+
+
+_default_rate_store = TokenBucketStore()
+
+
+def _rate_limit_key(request, key):
+    if key == "user":
+        return _user_rate_limit_key(request, request.user)
+    if key == "ip":
+        return _ip_rate_limit_key(request)
+    return key(request)
+
+
+async def _arate_limit_key(request, key):
+    if key == "user":
+        return _user_rate_limit_key(request, await _aget_user(request))
+    if key == "ip":
+        return _ip_rate_limit_key(request)
+    return await _acall(request, key, request)
+
+
+def _user_rate_limit_key(request, user):
+    if user.is_authenticated:
+        return f"user:{user.pk}"
+    return _ip_rate_limit_key(request)
+
+
+def _ip_rate_limit_key(request):
+    return f"ip:{request.META.get('REMOTE_ADDR')}"
+
+
+def _rate_limit_response(request, wait):
+    response = _process_response(
+        request, ({"message": "Too many requests"}, 429)
+    )
+    response["Retry-After"] = str(math.ceil(wait))
+    return response
+
+
+def cache_response(ttl, vary_on_user=False, store=None):
+    """Caches serialized responses of successful GET requests for `ttl`
+    seconds
+
+    The cache key is built of the path and `request.query`, so the decorator
+    should go under `@validate_query`. The store is an in-process LRU shared
+    by all views by default.
+    """
+
+    def decorator(f):
+        prefix = f"raw_api:{f.__module__}.{f.__qualname__}"
+
+        if asyncio.iscoroutinefunction(f):
+
+            async def wrapper(request, *args, **kwargs):
+                if request.method != "GET":
+                    return await f(request, *args, **kwargs)
+                user_id = (
+                    _get_user_id(await _aget_user(request))
+                    if vary_on_user
+                    else None
+                )
+                key = _response_cache_key(prefix, request, user_id)
+                cache = store or _default_cache_store
+                cached = await cache.aget(key)
+                if cached is not None:
+                    return _cached_response(cached)
+                result = await f(request, *args, **kwargs)
+                response, cacheable = _to_cacheable(
+                    request, await _afetch_queryset(result)
+                )
+                if cacheable is not None:
+                    await cache.aset(key, cacheable, ttl)
+                return response
+
+        else:
+
+            def wrapper(request, *args, **kwargs):
+                if request.method != "GET":
+                    return f(request, *args, **kwargs)
+                user_id = _get_user_id(request.user) if vary_on_user else None
+                key = _response_cache_key(prefix, request, user_id)
+                cache = store or _default_cache_store
+                cached = cache.get(key)
+                if cached is not None:
+                    return _cached_response(cached)
+                response, cacheable = _to_cacheable(
+                    request, f(request, *args, **kwargs)
+                )
+                if cacheable is not None:
+                    cache.set(key, cacheable, ttl)
+                return response
+
+        return wraps(f)(wrapper)
+
+    return decorator
+
+
+_default_cache_store = LRUStore(CACHE_SIZE)
+
+
+def _get_user_id(user):
+    return user.pk if user.is_authenticated else None
+
+
+def _response_cache_key(prefix, request, user_id):
+    query = getattr(request, "query", None)
+    if query is None:
+        query = request.GET.lists()
+    elif isinstance(query, Mapping):
+        query = query.items()
+    digest = hashlib.md5(
+        repr(sorted(query, key=lambda item: item[0])).encode("utf-8")
+    ).hexdigest()
+    codec = _response_codec(request)
+    if codec is not None:
+        encoding = codec.content_type
+    else:
+        encoding = "pretty" if _wants_pretty_json(request) else "json"
+    return f"{prefix}:{request.path}:{user_id}:{encoding}:{digest}"
+
+
+def _to_cacheable(request, result):
+    """Returns serialized response and its cache entry, which is `None` if
+    the response shouldn't be cached"""
+    response = _process_response(request, result)
+    if response is result or response.status_code != 200 or response.streaming:
+        return response, None
+    return response, (response["Content-Type"], response.content)
+
+
+def _cached_response(cached):
+    content_type, content = cached
+    response = HttpResponse(content, content_type=content_type)
+    if CODECS:
+        patch_vary_headers(response, ("Accept",))
+    return response
+
+
+def coalesce(vary_on_user=False):
+    """Runs an async view once for concurrent GET requests with the same path
+    and query, all of them get a copy of its response
+
+    The key is built of the path and `request.query`, so the decorator should
+    go under `@validate_query`. Streaming responses aren't shared, other
+    requests run the view themselves then.
+    """
+
+    def decorator(f):
+        if not asyncio.iscoroutinefunction(f):
+            raise TypeError("@coalesce only supports async views")
+        prefix = f"raw_api:coalesce:{f.__module__}.{f.__qualname__}"
+
+        async def wrapper(request, *args, **kwargs):
+            if request.method != "GET":
+                return await f(request, *args, **kwargs)
+            user_id = (
+                _get_user_id(await _aget_user(request))
+                if vary_on_user
+                else None
+            )
+            key = _response_cache_key(prefix, request, user_id)
+            response, started = await _coalescer.run(
+                key, lambda: _coalesced_response(f, request, args, kwargs)
+            )
+            if not response.streaming:
+                return _copy_response(response)
+            if started:
+                return response
+            return await f(request, *args, **kwargs)
+
+        return wraps(f)(wrapper)
+
+    return decorator
+
+
+_coalescer = Coalescer()
+
+
+async def _coalesced_response(f, request, args, kwargs):
+    result = await f(request, *args, **kwargs)
+    return _process_response(request, await _afetch_queryset(result))
+
+
+def _copy_response(response):
+    """Returns a copy of a response, so middleware of each request can
+    change it"""
+    copy = HttpResponse(response.content, status=response.status_code)
+    for header, value in response.items():
+        copy[header] = value
+    copy.cookies.update(response.cookies)
+    return copy
+
+
+def idempotent(ttl=24 * 60 * 60, store=None):
+    """Replays the stored response to retries of POST, PUT, PATCH and DELETE
+    requests with the same `Idempotency-Key` header within `ttl` seconds
+
+    A retry arriving while the first request is still handled waits for it.
+    Keys are per user and view, reusing a key with another body is answered
+    with 422. Server errors aren't stored, so such requests can be retried.
+    The store is an in-process LRU by default.
+    """
+
+    def decorator(f):
+        prefix = f"raw_api:idempotent:{f.__module__}.{f.__qualname__}"
+
+        if asyncio.iscoroutinefunction(f):
+
+            async def wrapper(request, *args, **kwargs):
+                idempotency_key = request.headers.get("Idempotency-Key")
+                if (
+                    not idempotency_key
+                    or request.method not in _IDEMPOTENT_METHODS
+                ):
+                    return await f(request, *args, **kwargs)
+                user_id = (
+                    _get_user_id(await _aget_user(request))
+                    if hasattr(request, "user")
+                    else None
+                )
+                key = f"{prefix}:{user_id}:{idempotency_key}"
+                fingerprint = hashlib.md5(request.body).hexdigest()
+                cache = store or _default_idempotency_store
+                while True:
+                    in_flight = _in_flight.join(key)
+                    if in_flight is None:
+                        break
+                    await asyncio.wrap_future(in_flight)
+                try:
+                    stored = await cache.aget(key)
+                    if stored is not None:
+                        return _replayed_response(stored, fingerprint)
+                    response, stored = _to_idempotent(
+                        request,
+                        await _afetch_queryset(
+                            await f(request, *args, **kwargs)
+                        ),
+                        fingerprint,
+                    )
+                    if stored is not None:
+                        await cache.aset(key, stored, ttl)
+                    return response
+                finally:
+                    _in_flight.done(key)
+
+        else:
+
+            def wrapper(request, *args, **kwargs):
+                idempotency_key = request.headers.get("Idempotency-Key")
+                if (
+                    not idempotency_key
+                    or request.method not in _IDEMPOTENT_METHODS
+                ):
+                    return f(request, *args, **kwargs)
+                user_id = (
+                    _get_user_id(request.user)
+                    if hasattr(request, "user")
+                    else None
+                )
+                key = f"{prefix}:{user_id}:{idempotency_key}"
+                fingerprint = hashlib.md5(request.body).hexdigest()
+                cache = store or _default_idempotency_store
+                while True:
+                    in_flight = _in_flight.join(key)
+                    if in_flight is None:
+                        break
+                    in_flight.result()
+                try:
+                    stored = cache.get(key)
+                    if stored is not None:
+                        return _replayed_response(stored, fingerprint)
+                    response, stored = _to_idempotent(
+                        request, f(request, *args, **kwargs), fingerprint
+                    )
+                    if stored is not None:
+                        cache.set(key, stored, ttl)
+                    return response
+                finally:
+                    _in_flight.done(key)
+
+        return wraps(f)(wrapper)
+
+    return decorator
+
+
+_IDEMPOTENT_METHODS = ("POST", "PUT", "PATCH", "DELETE")
+_default_idempotency_store = LRUStore(CACHE_SIZE)
+_in_flight = InFlight()
+
+
+def _to_idempotent(request, result, fingerprint):
+    """Returns serialized response and its store entry, which is `None` for
+    server errors and responses which can't be replayed"""
+    response = _process_response(request, result)
+    if response is result or response.status_code >= 500 or response.streaming:
+        return response, None
+    return response, (
+        fingerprint,
+        response.status_code,
+        response["Content-Type"],
+        response.content,
+    )
+
+
+def _replayed_response(stored, fingerprint):
+    stored_fingerprint, status, content_type, content = stored
+    if stored_fingerprint != fingerprint:
+        return {
+            "message": "Idempotency-Key is already used for another request"
+        }, 422
+    response = HttpResponse(content, status=status, content_type=content_type)
+    response["Idempotent-Replayed"] = "true"
+    return response
+
+
+def etag(version=None):
+    """Adds `ETag` header to successful GET responses and returns 304 to
+    clients having the same content
+
+    By default the tag is a hash of the response content. A `version(request,
+    *args, **kwargs)` callback returning a string (it can be async for async
+    views, sync ones run in the executor of sync work there) makes it a cheap
+    check which skips the view if nothing has changed.
+    """
+
+    def decorator(f):
+        if asyncio.iscoroutinefunction(f):
+
+            async def wrapper(request, *args, **kwargs):
+                if version is None or request.method not in ("GET", "HEAD"):
+                    tag = None
+                else:
+                    tag = quote_etag(
+                        await _acall(
+                            request, version, request, *args, **kwargs
+                        )
+                    )
+                    not_modified = get_conditional_response(request, etag=tag)
+                    if not_modified is not None:
+                        return not_modified
+                result = await f(request, *args, **kwargs)
+                response = _process_response(
+                    request, await _afetch_queryset(result)
+                )
+                return _tagged_response(request, response, tag)
+
+        else:
+
+            def wrapper(request, *args, **kwargs):
+                if version is None or request.method not in ("GET", "HEAD"):
+                    tag = None
+                else:
+                    tag = quote_etag(version(request, *args, **kwargs))
+                    not_modified = get_conditional_response(request, etag=tag)
+                    if not_modified is not None:
+                        return not_modified
+                response = _process_response(
+                    request, f(request, *args, **kwargs)
+                )
+                return _tagged_response(request, response, tag)
+
+        return wraps(f)(wrapper)
+
+    return decorator
+
+
+def _tagged_response(request, response, tag):
+    if tag is not None and response.status_code == 200:
+        response["ETag"] = tag
+    return _conditional_response(request, response)
+
+
+_batch_item = t.Dict(
+    {
+        "method": t.Enum("GET", "HEAD", "POST", "PUT", "PATCH", "DELETE"),
+        "path": t.String(),
+        t.Key("query", optional=True): t.Mapping(t.String(), t.Any()),
+        t.Key("body", optional=True): t.Any(),
+    }
+)
+
+
+@validate_json(t.List(_batch_item, max_length=BATCH_MAX_ITEMS))
+async def batch(request):
+    """Runs a JSON array of `{method, path, query?, body?}` requests and
+    returns an array of `{status, body}` results
+
+    Sub-requests share the session and user of the batch request and go
+    through the same raw_api processing as regular ones. Async views run
+    concurrently, sync ones in a thread pool of `RAW_API_BATCH_THREADS`.
+    """
+    if hasattr(request, "user"):
+        await _aget_user(request)
+    results = await asyncio.gather(
+        *(_run_batch_item(request, item) for item in request.json)
+    )
+    return _data_response(request, list(results))
+
+
+async def _run_batch_item(request, item):
+    sub_request = _batch_sub_request(request, item)
+    try:
+        match = resolve(sub_request.path_info)
+    except Resolver404:
+        return {"status": 404, "body": {"message": "Not found"}}
+    view = match.func
+    if view is batch:
+        return {"status": 400, "body": _nested_batch_error}
+    try:
+        if asyncio.iscoroutinefunction(view):
+            result = await view(sub_request, *match.args, **match.kwargs)
+        else:
+            result = await sync_to_async(
+                _run_sync_view,
+                thread_sensitive=False,
+                executor=_get_batch_executor(),
+            )(view, sub_request, match.args, match.kwargs)
+        return await _batch_result(sub_request, result)
+    except Http404:
+        return {"status": 404, "body": {"message": "Not found"}}
+    except PermissionDenied:
+        return {"status": 403, "body": {"message": "Permission denied"}}
+    except SuspiciousOperation:
+        return {"status": 400, "body": {"message": "Bad request"}}
+    except ExecutorSaturated:
+        data, status = _saturated_error_response
+        return {"status": status, "body": data}
+    except Exception:
+        logger.exception("Batch item failed: %s", sub_request.path)
+        return {"status": 500, "body": {"message": "Internal server error"}}
+
+
+# Nested batches would multiply the limit of items by each level
+_nested_batch_error = {"message": "Batch requests can't be nested"}
+
+
+def _run_sync_view(view, request, args, kwargs):
+    try:
+        return view(request, *args, **kwargs)
+    finally:
+        close_old_connections()
+
+
+def _batch_sub_request(request, item):
+    sub_request = HttpRequest()
+    sub_request.method = item["method"]
+    sub_request.path = sub_request.path_info = item["path"]
+    query = QueryDict(mutable=True)
+    for key, value in item.get("query", {}).items():
+        values = value if isinstance(value, list) else [value]
+        query.setlist(key, [str(v) for v in values])
+    sub_request.GET = query
+    sub_request.COOKIES = request.COOKIES
+    sub_request.META = {
+        **_batch_sub_request_meta(request.META),
+        "REQUEST_METHOD": item["method"],
+        "PATH_INFO": item["path"],
+        "QUERY_STRING": query.urlencode(),
+    }
+    if "body" in item:
+        sub_request._body = JSON_BACKEND.dumps(item["body"])
+        sub_request.META["CONTENT_TYPE"] = "application/json"
+        sub_request.META["CONTENT_LENGTH"] = str(len(sub_request._body))
+    else:
+        sub_request._body = b""
+    for attr in ("session", "user", "_raw_api_user"):
+        if hasattr(request, attr):
+            setattr(sub_request, attr, getattr(request, attr))
+    _add_json_property(sub_request)
+    if "body" in item:
+        sub_request._raw_api_json = item["body"]
+    return sub_request
+
+
+def _batch_sub_request_meta(meta):
+    """Returns server and connection keys and headers of the batch request
+    without ones describing its body, conditional and idempotency headers,
+    which don't apply to sub-requests"""
+    return {
+        key: value
+        for key, value in meta.items()
+        if key not in _BATCH_REQUEST_ONLY_KEYS
+        and not key.startswith(_BATCH_REQUEST_ONLY_PREFIXES)
+    }
+
+
+_BATCH_REQUEST_ONLY_KEYS = frozenset(
+    (
+        "CONTENT_LENGTH",
+        "CONTENT_TYPE",
+        "HTTP_IDEMPOTENCY_KEY",
+        "wsgi.input",
+    )
+)
+_BATCH_REQUEST_ONLY_PREFIXES = ("HTTP_CONTENT_", "HTTP_IF_")
+
+
+async def _batch_result(request, result):
+    """Turns a view result into `{status, body}` without serializing raw
+    data twice"""
+    if isinstance(result, HttpResponseBase):
+        return await _batch_response_result(result)
+    data, status = _split_status(result)
+    if inspect.isgenerator(data):
+        data = list(data)
+    elif inspect.isasyncgen(data):
+        data = [item async for item in data]
+    elif isinstance(data, QuerySet):
+        data = await serializers.aqueryset_rows(data)
+    elif not isinstance(data, (str, dict, list)):
+        return await _batch_response_result(_process_response(request, result))
+    return {"status": status, "body": data}
+
+
+async def _batch_response_result(response):
+    if response.streaming:
+        if getattr(response, "is_async", False):
+            content = b"".join(
+                [chunk async for chunk in response.streaming_content]
+            )
+        else:
+            content = b"".join(response.streaming_content)
+    else:
+        content = response.content
+    content_type = response.get("Content-Type", "")
+    codec = _get_codec(content_type) if CODECS else None
+    if codec is not None:
+        body = codec.loads(content) if content else None
+    elif content_type.startswith("application/json"):
+        body = JSON_BACKEND.loads(content) if content else None
+    else:
+        body = content.decode(response.charset)
+    return {"status": response.status_code, "body": body}
+
+
+_batch_executor = None
+
+
+def _get_batch_executor():
+    global _batch_executor
+    if _batch_executor is None:
+        _batch_executor = ThreadPoolExecutor(
+            BATCH_THREADS, thread_name_prefix="raw_api_batch"
+        )
+    return _batch_executor
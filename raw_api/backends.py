@@ -0,0 +1,96 @@
+"""JSON backends used to parse requests and encode responses
+
+A backend is anything with two methods:
+
+- `loads(data: bytes)` - parses a request body
+- `dumps(data, pretty: bool) -> bytes` - encodes a response body
+
+Backends of the `json` module are marked with `stdlib=True`, compiled
+encoders and parsing in parts are only used with them as their output has
+to match.
+"""
+
+import json
+from typing import Any, Callable, NamedTuple
+
+from django.utils.module_loading import import_string
+
+from . import serializers
+
+
+class JsonBackend(NamedTuple):
+    loads: Callable[[bytes], Any]
+    dumps: Callable[[Any, bool], bytes]
+    stdlib: bool = False
+
+
+def stdlib_backend() -> JsonBackend:
+    def dumps(data, pretty=False):
+        if pretty:
+            return json.dumps(
+                data,
+                default=serializers.default,
+                indent=4,
+                ensure_ascii=False,
+                sort_keys=True,
+            ).encode("utf-8")
+        return json.dumps(
+            data, default=serializers.default, separators=(",", ":")
+        ).encode("utf-8")
+
+    return JsonBackend(json.loads, dumps, stdlib=True)
+
+
+def orjson_backend() -> JsonBackend:
+    import orjson
+
+    pretty_option = orjson.OPT_INDENT_2 | orjson.OPT_SORT_KEYS
+
+    def dumps(data, pretty=False):
+        return orjson.dumps(
+            data,
+            default=serializers.default,
+            option=pretty_option if pretty else None,
+        )
+
+    return JsonBackend(orjson.loads, dumps)
+
+
+def ujson_backend() -> JsonBackend:
+    import ujson
+
+    def dumps(data, pretty=False):
+        if pretty:
+            return ujson.dumps(
+                data,
+                default=serializers.default,
+                indent=4,
+                ensure_ascii=False,
+                sort_keys=True,
+            ).encode("utf-8")
+        return ujson.dumps(data, default=serializers.default).encode("utf-8")
+
+    return JsonBackend(ujson.loads, dumps)
+
+
+BACKENDS = {
+    "json": stdlib_backend,
+    "orjson": orjson_backend,
+    "ujson": ujson_backend,
+}
+
+
+def get_backend(name_or_backend: Any) -> JsonBackend:
+    """Resolves value of `RAW_API_JSON_BACKEND` setting
+
+    It can be a name from `BACKENDS`, a dotted path to a backend or a factory
+    returning it, or a backend object itself
+    """
+    backend = name_or_backend
+    if isinstance(backend, str):
+        backend = BACKENDS.get(backend) or import_string(backend)
+    if not hasattr(backend, "loads") and callable(backend):
+        backend = backend()
+    if not (hasattr(backend, "loads") and hasattr(backend, "dumps")):
+        raise ValueError(f"Not a JSON backend: {name_or_backend!r}")
+    return backend
@@ -0,0 +1,94 @@
+"""Stores of serialized responses
+
+A store has sync `get(key)` / `set(key, value, ttl)` methods and their async
+`aget` / `aset` counterparts. `get` returns `None` for missing keys.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Optional
+
+from django.core.cache import caches
+
+
+class LRUStore:
+    """In-process store evicting least recently used entries when the total
+    size of values exceeds `max_size` bytes"""
+
+    def __init__(self, max_size: int = 32 * 1024 * 1024):
+        self.max_size = max_size
+        self.size = 0
+        self._entries: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            try:
+                expires, value, size = self._entries[key]
+            except KeyError:
+                return None
+            if expires < time.monotonic():
+                self._pop(key)
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: Any, ttl: float) -> None:
+        size = _size(value)
+        if size > self.max_size:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._pop(key)
+            self._entries[key] = time.monotonic() + ttl, value, size
+            self.size += size
+            while self.size > self.max_size:
+                self._pop(next(iter(self._entries)))
+
+    async def aget(self, key: str) -> Optional[Any]:
+        return self.get(key)
+
+    async def aset(self, key: str, value: Any, ttl: float) -> None:
+        self.set(key, value, ttl)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.size = 0
+
+    def _pop(self, key):
+        self.size -= self._entries.pop(key)[2]
+
+
+def _size(value) -> int:
+    """Approximate size of a stored value, which is bytes or a tuple of
+    bytes / strings"""
+    if isinstance(value, tuple):
+        return sum(_size(v) for v in value)
+    if isinstance(value, (bytes, str)):
+        return len(value)
+    return 8
+
+
+class DjangoCacheStore:
+    """Store on top of Django's cache framework"""
+
+    def __init__(self, alias: str = "default"):
+        self.alias = alias
+
+    @property
+    def cache(self):
+        return caches[self.alias]
+
+    def get(self, key: str) -> Optional[Any]:
+        return self.cache.get(key)
+
+    def set(self, key: str, value: Any, ttl: float) -> None:
+        self.cache.set(key, value, ttl)
+
+    async def aget(self, key: str) -> Optional[Any]:
+        return await self.cache.aget(key)
+
+    async def aset(self, key: str, value: Any, ttl: float) -> None:
+        await self.cache.aset(key, value, ttl)
@@ -0,0 +1,75 @@
+"""Binary formats negotiated by `Content-Type` and `Accept` headers
+
+A codec is anything with:
+
+- `content_type: str` - media type it handles
+- `loads(data: bytes)` - parses a request body
+- `dumps(data) -> bytes` - encodes a response body
+
+Values the format doesn't support natively (dates, decimals, dataclasses, ...)
+are encoded the same way as in JSON responses.
+"""
+
+from typing import Any, Callable, Dict, Iterable, NamedTuple
+
+from django.utils.module_loading import import_string
+
+from . import serializers
+
+
+class Codec(NamedTuple):
+    content_type: str
+    loads: Callable[[bytes], Any]
+    dumps: Callable[[Any], bytes]
+
+
+def msgpack_codec() -> Codec:
+    import msgpack
+
+    def loads(data):
+        return msgpack.unpackb(data, raw=False)
+
+    def dumps(data):
+        return msgpack.packb(data, default=serializers.default)
+
+    return Codec("application/msgpack", loads, dumps)
+
+
+def cbor_codec() -> Codec:
+    import cbor2
+
+    def encode_default(encoder, value):
+        encoder.encode(serializers.default(value))
+
+    def dumps(data):
+        return cbor2.dumps(data, default=encode_default)
+
+    return Codec("application/cbor", cbor2.loads, dumps)
+
+
+CODECS = {
+    "msgpack": msgpack_codec,
+    "cbor": cbor_codec,
+}
+
+
+def get_codecs(names_or_codecs: Iterable[Any]) -> Dict[str, Codec]:
+    """Resolves value of `RAW_API_CODECS` setting into codecs by their
+    content types
+
+    Each item can be a name from `CODECS`, a dotted path to a codec or
+    a factory returning it, or a codec object itself
+    """
+    codecs = {}
+    for name_or_codec in names_or_codecs:
+        codec = name_or_codec
+        if isinstance(codec, str):
+            codec = CODECS.get(codec) or import_string(codec)
+        if not hasattr(codec, "content_type") and callable(codec):
+            codec = codec()
+        if not all(
+            hasattr(codec, attr) for attr in ("content_type", "loads", "dumps")
+        ):
+            raise ValueError(f"Not a codec: {name_or_codec!r}")
+        codecs[codec.content_type] = codec
+    return codecs
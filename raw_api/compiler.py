@@ -0,0 +1,379 @@
+"""Compiles trafaret-style schemas into plain Python validators
+
+The common subset of `trafaret.constructor.construct` syntax (`{"key": type}`,
+optional `"key?"` keys, `[type]` lists, nested dicts, `int`, `float`, `str`
+and `bool`) is turned into the source of a single function, so valid data
+doesn't go through the generic trafaret object graph. Any other part of
+a schema is validated by its trafaret inline.
+
+Invalid data is revalidated by the trafaret itself, so errors are exactly
+the same `DataError`s.
+
+The same subset is compiled into JSON encoders of data of the schema shape by
+`compile_encoder`.
+"""
+
+import numbers
+from collections.abc import Mapping
+from json.encoder import encode_basestring_ascii
+from typing import Any, Callable
+
+import trafaret as t
+from trafaret import DataError
+from trafaret.constructor import construct
+
+
+def compile_validator(schema: Any) -> Callable[[Any], Any]:
+    """Returns a validator equivalent to `construct(schema)`"""
+    trafaret = construct(schema)
+    if isinstance(schema, t.Trafaret):
+        return trafaret
+    compiler = _Compiler()
+    compiler.emit(schema, "data", "result", 2)
+    source = "\n".join(
+        [
+            "def validate(data):",
+            "    try:",
+            *compiler.lines,
+            "    except _Invalid:",
+            "        return trafaret(data)",
+            "    return result",
+        ]
+    )
+    namespace = {
+        "_Invalid": _Invalid,
+        "_missing": _missing,
+        "_to_int": _to_int,
+        "_to_float": _to_float,
+        "DataError": DataError,
+        "Mapping": Mapping,
+        "trafaret": trafaret,
+        **compiler.trafarets,
+    }
+    exec(compile(source, "<raw_api validator>", "exec"), namespace)
+    validate = namespace["validate"]
+    validate.source = source
+    return validate
+
+
+class _Invalid(Exception):
+    pass
+
+
+_missing = object()
+
+
+def _to_int(value):
+    """`trafaret.ToInt` without building `DataError`s"""
+    if isinstance(value, int):
+        return value
+    if isinstance(value, float) and not value.is_integer():
+        raise _Invalid
+    if not isinstance(value, (str, numbers.Real)):
+        raise _Invalid
+    try:
+        return int(value)
+    except ValueError:
+        raise _Invalid
+
+
+def _to_float(value):
+    """`trafaret.ToFloat` without building `DataError`s"""
+    if isinstance(value, float):
+        return value
+    if not isinstance(value, (str, numbers.Real)):
+        raise _Invalid
+    try:
+        return float(value)
+    except ValueError:
+        raise _Invalid
+
+
+class _Compiler:
+    def __init__(self):
+        self.lines = []
+        self.trafarets = {}
+        self.counter = 0
+
+    def name(self, prefix):
+        self.counter += 1
+        return f"{prefix}_{self.counter}"
+
+    def line(self, indent, code):
+        self.lines.append("    " * indent + code)
+
+    def emit(self, schema, src, dst, indent):
+        """Emits code validating `src` variable into `dst`"""
+        if schema is int:
+            self.line(indent, f"{dst} = {src}")
+            self.line(indent, f"if {src}.__class__ is not int:")
+            self.line(indent + 1, f"{dst} = _to_int({src})")
+        elif schema is float:
+            self.line(indent, f"{dst} = {src}")
+            self.line(indent, f"if {src}.__class__ is not float:")
+            self.line(indent + 1, f"{dst} = _to_float({src})")
+        elif schema is str:
+            self.line(indent, f"if not isinstance({src}, str) or not {src}:")
+            self.line(indent + 1, "raise _Invalid")
+            self.line(indent, f"{dst} = {src}")
+        elif schema is bool:
+            self.line(indent, f"if {src}.__class__ is not bool:")
+            self.line(indent + 1, "raise _Invalid")
+            self.line(indent, f"{dst} = {src}")
+        elif isinstance(schema, list) and len(schema) == 1:
+            self.emit_list(schema[0], src, dst, indent)
+        elif isinstance(schema, dict) and all(
+            isinstance(key, str) for key in schema
+        ):
+            self.emit_dict(schema, src, dst, indent)
+        else:
+            self.emit_trafaret(schema, src, dst, indent)
+
+    def emit_list(self, schema, src, dst, indent):
+        item, value = self.name("item"), self.name("value")
+        self.line(indent, f"if not isinstance({src}, list):")
+        self.line(indent + 1, "raise _Invalid")
+        self.line(indent, f"{dst} = []")
+        self.line(indent, f"for {item} in {src}:")
+        self.emit(schema, item, value, indent + 1)
+        self.line(indent + 1, f"{dst}.append({value})")
+
+    def emit_dict(self, schema, src, dst, indent):
+        seen = self.name("seen")
+        self.line(
+            indent,
+            f"if {src}.__class__ is not dict"
+            f" and not isinstance({src}, Mapping):",
+        )
+        self.line(indent + 1, "raise _Invalid")
+        self.line(indent, f"{dst} = {{}}")
+        self.line(indent, f"{seen} = 0")
+        for key, value_schema in schema.items():
+            optional = key.endswith("?")
+            name = key[:-1] if optional else key
+            raw, value = self.name("raw"), self.name("value")
+            self.line(indent, f"{raw} = {src}.get({name!r}, _missing)")
+            if optional:
+                self.line(indent, f"if {raw} is not _missing:")
+                body = indent + 1
+            else:
+                self.line(indent, f"if {raw} is _missing:")
+                self.line(indent + 1, "raise _Invalid")
+                body = indent
+            self.line(body, f"{seen} += 1")
+            self.emit(value_schema, raw, value, body)
+            self.line(body, f"{dst}[{name!r}] = {value}")
+        self.line(indent, f"if len({src}) != {seen}:")
+        self.line(indent + 1, "raise _Invalid")
+
+    def emit_trafaret(self, schema, src, dst, indent):
+        trafaret = self.name("trafaret")
+        self.trafarets[trafaret] = construct(schema)
+        self.line(indent, "try:")
+        self.line(indent + 1, f"{dst} = {trafaret}({src})")
+        self.line(indent, "except DataError:")
+        self.line(indent + 1, "raise _Invalid")
+
+
+def compile_encoder(
+    schema: Any, dumps: Callable[[Any], str]
+) -> Callable[[Any], bytes]:
+    """Returns a function encoding data of the schema shape as compact JSON
+
+    Dicts are encoded as f-strings of precomputed keys and values checked by
+    their exact types. Data of any other shape, including dicts with extra
+    keys, is encoded by `dumps` as a whole, so the output is always the
+    same data. Values of schema parts other than the compiled subset are
+    encoded by `dumps` too.
+    """
+    compiler = _EncoderCompiler()
+    root = compiler.function(schema)
+    source = "\n".join(
+        [
+            *compiler.lines,
+            "def encode(data):",
+            "    try:",
+            f"        return {root}(data).encode()",
+            "    except (_Invalid, KeyError, TypeError):",
+            "        return dumps(data).encode()",
+        ]
+    )
+    namespace = {
+        "_Invalid": _Invalid,
+        "_missing": _missing,
+        "_int": _encode_int,
+        "_float": _encode_float,
+        "_str": encode_basestring_ascii,
+        "_bool": _encode_bool,
+        "_int_repr": int.__repr__,
+        "_float_repr": float.__repr__,
+        "dumps": dumps,
+    }
+    exec(compile(source, "<raw_api encoder>", "exec"), namespace)
+    encode = namespace["encode"]
+    encode.source = source
+    return encode
+
+
+def _encode_int(value):
+    if value.__class__ is not int:
+        raise _Invalid
+    return int.__repr__(value)
+
+
+def _encode_float(value):
+    # `value - value` isn't 0 for NaN and infinities
+    if value.__class__ is not float or value - value != 0:
+        raise _Invalid
+    return float.__repr__(value)
+
+
+def _encode_bool(value):
+    if value.__class__ is not bool:
+        raise _Invalid
+    return "true" if value else "false"
+
+
+_ENCODERS = {int: "_int", float: "_float", str: "_str", bool: "_bool"}
+
+
+class _EncoderCompiler:
+    def __init__(self):
+        self.lines = []
+        self.counter = 0
+
+    def name(self, prefix):
+        self.counter += 1
+        return f"{prefix}_{self.counter}"
+
+    def function(self, schema):
+        """Returns name of a function encoding values of the schema"""
+        if isinstance(schema, type) and schema in _ENCODERS:
+            return _ENCODERS[schema]
+        if isinstance(schema, list) and len(schema) == 1:
+            return self.list_function(schema[0])
+        if isinstance(schema, dict) and all(
+            isinstance(key, str) for key in schema
+        ):
+            return self.dict_function(schema)
+        return "dumps"
+
+    def list_function(self, schema):
+        item = self.function(schema)
+        name = self.name("encode_list")
+        self.lines += [
+            f"def {name}(value):",
+            "    if value.__class__ is not list:",
+            "        raise _Invalid",
+            f"    return '[' + ','.join(map({item}, value)) + ']'",
+        ]
+        return name
+
+    def dict_function(self, schema):
+        """Keys are encoded in the schema order, values of required keys are
+        checked at once"""
+        name = self.name("encode_dict")
+        fields = [
+            (
+                (key[:-1], True, value_schema)
+                if key.endswith("?")
+                else (key, False, value_schema)
+            )
+            for key, value_schema in schema.items()
+        ]
+        has_optional = any(optional for _, optional, _ in fields)
+        lines = [f"def {name}(value):"]
+        if has_optional:
+            lines.append("    if value.__class__ is not dict:")
+        else:
+            lines.append(
+                "    if value.__class__ is not dict"
+                f" or len(value) != {len(fields)}:"
+            )
+        lines.append("        raise _Invalid")
+
+        checks, parts = [], []
+        for key, optional, value_schema in fields:
+            var = self.name("value")
+            check, expression = self.value(value_schema, var)
+            parts.append((key, optional, var, check, expression))
+            if not optional:
+                lines.append(f"    {var} = value[{key!r}]")
+                if check:
+                    checks.append(check)
+        if checks:
+            lines.append(f"    if {' or '.join(checks)}:")
+            lines.append("        raise _Invalid")
+        if not has_optional:
+            items = [(key, expression) for key, _, _, _, expression in parts]
+            lines.append(f"    return {_fstring(items, '{', '}')}")
+            self.lines += lines
+            return name
+
+        lines.append("    items = []")
+        for key, optional, var, check, expression in parts:
+            item = f"items.append({_fstring([(key, expression)])})"
+            if not optional:
+                lines.append(f"    {item}")
+                continue
+            lines.append(f"    {var} = value.get({key!r}, _missing)")
+            lines.append(f"    if {var} is not _missing:")
+            if check:
+                lines.append(f"        if {check}:")
+                lines.append("            raise _Invalid")
+            lines.append(f"        {item}")
+        lines += [
+            "    if len(value) != len(items):",
+            "        raise _Invalid",
+            "    return '{' + ','.join(items) + '}'",
+        ]
+        self.lines += lines
+        return name
+
+    def value(self, schema, var):
+        """Returns a type check of a dict value and an expression encoding
+        it"""
+        if schema is int:
+            return f"{var}.__class__ is not int", f"_int_repr({var})"
+        if schema is float:
+            return (
+                f"{var}.__class__ is not float or {var} - {var} != 0",
+                f"_float_repr({var})",
+            )
+        if schema is str:
+            return f"{var}.__class__ is not str", f"_str({var})"
+        if schema is bool:
+            return (
+                f"{var}.__class__ is not bool",
+                f'("true" if {var} else "false")',
+            )
+        if isinstance(schema, list) and len(schema) == 1:
+            item = self.function(schema[0])
+            return (
+                f"{var}.__class__ is not list",
+                f'"[" + ",".join(map({item}, {var})) + "]"',
+            )
+        return None, f"{self.function(schema)}({var})"
+
+
+def _fstring(parts, start="", end=""):
+    """Returns source of an f-string of `"key":value` parts joined by
+    commas"""
+    literal, source = start, ""
+    for index, (key, expression) in enumerate(parts):
+        if index:
+            literal += ","
+        literal += encode_basestring_ascii(key) + ":"
+        source += _escape(literal) + "{" + expression + "}"
+        literal = ""
+    return "f'" + source + _escape(literal + end) + "'"
+
+
+def _escape(literal):
+    """Escapes literal text of an f-string, which is ASCII JSON"""
+    return (
+        literal.replace("\\", "\\\\")
+        .replace("'", "\\'")
+        .replace("{", "{{")
+        .replace("}", "}}")
+    )
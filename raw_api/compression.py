@@ -0,0 +1,51 @@
+"""Gzip compression of response bodies"""
+
+import zlib
+from typing import AsyncIterable, Iterable
+
+# `wbits` making zlib write gzip headers and trailers
+_GZIP_WBITS = 16 + zlib.MAX_WBITS
+
+
+def accepts_gzip(accept_encoding: str) -> bool:
+    """Checks if `Accept-Encoding` header value allows gzip"""
+    qualities = {}
+    for coding in accept_encoding.split(","):
+        name, _, params = coding.partition(";")
+        name = name.strip().lower()
+        if name not in ("gzip", "*"):
+            continue
+        params = params.replace(" ", "")
+        try:
+            qualities[name] = float(params[2:]) if params[:2] == "q=" else 1
+        except ValueError:
+            qualities[name] = 0
+    return qualities.get("gzip", qualities.get("*", 0)) > 0
+
+
+def gzip_bytes(data: bytes, level: int) -> bytes:
+    compressor = zlib.compressobj(level, zlib.DEFLATED, _GZIP_WBITS)
+    return compressor.compress(data) + compressor.flush()
+
+
+def gzip_chunks(chunks: Iterable[bytes], level: int) -> Iterable[bytes]:
+    """Compresses chunks one by one flushing each of them, so the client
+    gets data as soon as it's produced"""
+    compressor = zlib.compressobj(level, zlib.DEFLATED, _GZIP_WBITS)
+    for chunk in chunks:
+        data = compressor.compress(chunk) + compressor.flush(zlib.Z_SYNC_FLUSH)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+async def agzip_chunks(
+    chunks: AsyncIterable[bytes], level: int
+) -> AsyncIterable[bytes]:
+    """Async version of `gzip_chunks`"""
+    compressor = zlib.compressobj(level, zlib.DEFLATED, _GZIP_WBITS)
+    async for chunk in chunks:
+        data = compressor.compress(chunk) + compressor.flush(zlib.Z_SYNC_FLUSH)
+        if data:
+            yield data
+    yield compressor.flush()
@@ -0,0 +1,120 @@
+"""Execution of sync functions from async views"""
+
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from time import perf_counter_ns
+from typing import Any, Callable, Dict, Optional
+
+from asgiref.sync import sync_to_async
+from django.db import close_old_connections
+
+
+class ExecutorSaturated(Exception):
+    """Raised instead of queueing a call when the queue is full"""
+
+
+class SyncExecutor:
+    """Runs sync functions from async code
+
+    With `thread_sensitive=True` calls go to the thread asgiref uses for all
+    thread-sensitive code, otherwise to a pool of `threads` threads of its
+    own. With `max_queue` calls waiting for a free thread are limited and
+    others raise `ExecutorSaturated`.
+
+    Totals of time calls waited in the queue and ran are kept for metrics.
+    """
+
+    def __init__(
+        self,
+        threads: int = 4,
+        thread_sensitive: bool = True,
+        max_queue: Optional[int] = None,
+    ):
+        self.threads = threads
+        self.thread_sensitive = thread_sensitive
+        self.max_queue = max_queue
+        self.calls = 0
+        self.rejected = 0
+        self.pending = 0
+        self.wait_ns = 0
+        self.run_ns = 0
+        self._lock = threading.Lock()
+        self._pool = None
+
+    async def run(
+        self,
+        func: Callable,
+        *args,
+        timings: Optional[Dict[str, int]] = None,
+        **kwargs,
+    ) -> Any:
+        """Runs `func` in a thread, its queue wait and run times are added
+        to `sync_wait` and `sync_run` of `timings` if it's given"""
+        workers = 1 if self.thread_sensitive else self.threads
+        with self._lock:
+            if (
+                self.max_queue is not None
+                and self.pending >= workers + self.max_queue
+            ):
+                self.rejected += 1
+                raise ExecutorSaturated
+            self.pending += 1
+            self.calls += 1
+        try:
+            if self.thread_sensitive:
+                run = sync_to_async(self._call, thread_sensitive=True)
+            else:
+                run = sync_to_async(
+                    self._call_and_close_connections,
+                    thread_sensitive=False,
+                    executor=self._get_pool(),
+                )
+            result, wait_ns, run_ns = await run(
+                perf_counter_ns(), func, args, kwargs
+            )
+        finally:
+            with self._lock:
+                self.pending -= 1
+        with self._lock:
+            self.wait_ns += wait_ns
+            self.run_ns += run_ns
+        if timings is not None:
+            timings["sync_wait"] = timings.get("sync_wait", 0) + wait_ns
+            timings["sync_run"] = timings.get("sync_run", 0) + run_ns
+        return result
+
+    def stats(self) -> Dict[str, int]:
+        """Returns counters of calls and total queue wait and run times in
+        nanoseconds"""
+        with self._lock:
+            return {
+                "calls": self.calls,
+                "rejected": self.rejected,
+                "pending": self.pending,
+                "wait_ns": self.wait_ns,
+                "run_ns": self.run_ns,
+            }
+
+    @staticmethod
+    def _call(submitted, func, args, kwargs):
+        start = perf_counter_ns()
+        result = func(*args, **kwargs)
+        return result, start - submitted, perf_counter_ns() - start
+
+    @classmethod
+    def _call_and_close_connections(cls, submitted, func, args, kwargs):
+        """Pool threads outlive requests, so they close expired database
+        connections like Django does after each request"""
+        try:
+            return cls._call(submitted, func, args, kwargs)
+        finally:
+            close_old_connections()
+
+    def _get_pool(self):
+        if self._pool is None:
+            with self._lock:
+                if self._pool is None:
+                    self._pool = ThreadPoolExecutor(
+                        self.threads, thread_name_prefix="raw_api_sync"
+                    )
+        return self._pool
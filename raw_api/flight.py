@@ -0,0 +1,83 @@
+"""Tracking of work in progress, so duplicates wait for it instead of doing
+it again"""
+
+import asyncio
+import threading
+from concurrent.futures import Future
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+
+class InFlight:
+    """Work in progress by key within the process
+
+    Futures are used as they can be waited for both by threads and, with
+    `asyncio.wrap_future`, by coroutines of any event loop.
+    """
+
+    def __init__(self):
+        self._futures: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+
+    def join(self, key: str) -> Optional[Future]:
+        """Returns `None` if there's no work with the key, then the caller
+        does it and has to call `done(key)` in the end, or a future resolved
+        when the work in progress is done"""
+        with self._lock:
+            future = self._futures.get(key)
+            if future is None:
+                self._futures[key] = Future()
+            return future
+
+    def done(self, key: str, result: Any = None) -> None:
+        with self._lock:
+            future = self._futures.pop(key)
+        future.set_result(result)
+
+
+class Coalescer:
+    """Shares a single run of a coroutine between concurrent callers with
+    the same key
+
+    The coroutine runs as a task shielded from cancellation of any single
+    caller, it's cancelled only when all of them are. Its result or error is
+    passed to every caller.
+    """
+
+    def __init__(self):
+        self._flights: Dict[Tuple[Any, str], _Flight] = {}
+
+    async def run(
+        self, key: str, start: Callable[[], Awaitable]
+    ) -> Tuple[Any, bool]:
+        """Returns the result of a coroutine run by `start()` or the one in
+        progress with the same key, and if it's been started by this call"""
+        flight_key = asyncio.get_running_loop(), key
+        flight = self._flights.get(flight_key)
+        started = flight is None
+        if started:
+            flight = self._flights[flight_key] = _Flight(
+                asyncio.ensure_future(start())
+            )
+            flight.task.add_done_callback(
+                lambda _: self._forget(flight_key, flight)
+            )
+        flight.waiters += 1
+        try:
+            return await asyncio.shield(flight.task), started
+        finally:
+            flight.waiters -= 1
+            if not flight.waiters and not flight.task.done():
+                flight.task.cancel()
+                self._forget(flight_key, flight)
+
+    def _forget(self, flight_key, flight):
+        if self._flights.get(flight_key) is flight:
+            del self._flights[flight_key]
+
+
+class _Flight:
+    __slots__ = ("task", "waiters")
+
+    def __init__(self, task: asyncio.Future):
+        self.task = task
+        self.waiters = 0
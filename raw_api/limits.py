@@ -0,0 +1,120 @@
+"""Cheap checks of JSON bodies before they're parsed
+
+The checks run at C speed over the raw bytes: strings are split out by quotes
+(or a regular expression if there are escaped quotes), keys are counted as
+colons outside of strings, and nesting depth is a running sum over brackets.
+Bodies in other formats are checked by a walk over the parsed data instead.
+"""
+
+import re
+from itertools import accumulate
+from typing import Any, Dict, NamedTuple, Optional
+
+_STRING = re.compile(rb'"[^"\\]*(?:\\.[^"\\]*)*"')
+
+# Maps opening brackets to 1 and closing ones to -1 as signed bytes
+_BRACKETS = bytes.maketrans(b"[{]}", b"\x01\x01\xff\xff")
+_NOT_BRACKETS = bytes(set(range(256)) - set(b"[]{}"))
+
+
+_MESSAGES = {
+    "max_body_size": "body is larger than {} bytes",
+    "max_depth": "nesting depth is greater than {}",
+    "max_keys": "number of keys is greater than {}",
+    "max_string_length": "string is longer than {} bytes",
+}
+
+
+class JsonLimits(NamedTuple):
+    max_body_size: Optional[int] = None
+    max_depth: Optional[int] = None
+    max_keys: Optional[int] = None
+    max_string_length: Optional[int] = None
+
+
+def check_body_size(
+    limits: JsonLimits, content_length: Optional[int]
+) -> Optional[Dict[str, str]]:
+    """Returns an error keyed by the limit if the body is larger than
+    allowed"""
+    if (
+        limits.max_body_size is not None
+        and content_length is not None
+        and content_length > limits.max_body_size
+    ):
+        return _error(limits, "max_body_size")
+    return None
+
+
+def check_json(limits: JsonLimits, body: bytes) -> Optional[Dict[str, str]]:
+    """Returns an error keyed by the limit if the body exceeds structure
+    limits"""
+    if (
+        limits.max_depth is None
+        and limits.max_keys is None
+        and limits.max_string_length is None
+    ):
+        return None
+    if b'\\"' in body:
+        strings = [s[1:-1] for s in _STRING.findall(body)]
+        structure = _STRING.sub(b"", body)
+    else:
+        parts = body.split(b'"')
+        strings = parts[1::2]
+        structure = b"".join(parts[::2])
+
+    if limits.max_string_length is not None:
+        if max(map(len, strings), default=0) > limits.max_string_length:
+            return _error(limits, "max_string_length")
+    if limits.max_keys is not None:
+        if structure.count(b":") > limits.max_keys:
+            return _error(limits, "max_keys")
+    if limits.max_depth is not None:
+        brackets = structure.translate(_BRACKETS, _NOT_BRACKETS)
+        depth = max(accumulate(memoryview(brackets).cast("b")), default=0)
+        if depth > limits.max_depth:
+            return _error(limits, "max_depth")
+    return None
+
+
+def check_data(limits: JsonLimits, data: Any) -> Optional[Dict[str, str]]:
+    """Returns an error keyed by the limit if parsed data exceeds structure
+    limits, keys are checked as strings too like they're in JSON"""
+    if (
+        limits.max_depth is None
+        and limits.max_keys is None
+        and limits.max_string_length is None
+    ):
+        return None
+    max_length = keys = max_depth = 0
+    stack = [(data, 0)]
+    while stack:
+        value, depth = stack.pop()
+        if isinstance(value, str):
+            length = len(value) if value.isascii() else len(value.encode())
+            max_length = max(max_length, length)
+        elif isinstance(value, bytes):
+            max_length = max(max_length, len(value))
+        elif isinstance(value, (dict, list, tuple)):
+            depth += 1
+            max_depth = max(max_depth, depth)
+            if isinstance(value, dict):
+                keys += len(value)
+                stack.extend((key, depth) for key in value)
+                value = value.values()
+            stack.extend((item, depth) for item in value)
+
+    if limits.max_string_length is not None:
+        if max_length > limits.max_string_length:
+            return _error(limits, "max_string_length")
+    if limits.max_keys is not None:
+        if keys > limits.max_keys:
+            return _error(limits, "max_keys")
+    if limits.max_depth is not None:
+        if max_depth > limits.max_depth:
+            return _error(limits, "max_depth")
+    return None
+
+
+def _error(limits, name):
+    return {name: _MESSAGES[name].format(getattr(limits, name))}
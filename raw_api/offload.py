@@ -0,0 +1,171 @@
+"""Parsing and encoding of large payloads in threads
+
+The work is CPU-bound and holds the GIL. A single `json.loads` or `dumps`
+call never gives it away, so a thread alone wouldn't help the event loop:
+large payloads are parsed and encoded in parts, and the event loop takes
+the GIL back between them. Processes would have to pickle the same data
+they'd parse or encode.
+"""
+
+import json
+from itertools import islice
+from typing import Any, Callable
+
+# Size of parts large payloads are encoded in
+PART_SIZE = 64 * 1024
+
+# Lists longer than this are estimated by a sample of this many items
+SAMPLE_SIZE = 3
+# Dicts longer than this are estimated by a sample of their first items,
+# shorter ones are walked as a whole as they often mix small and large values
+MAX_DICT_SIZE = 64
+
+
+def estimate_size(data: Any) -> int:
+    """Estimates size of data encoded as JSON in bytes
+
+    Long lists and dicts are estimated by a few items, so the cost doesn't
+    grow with their length
+    """
+    if isinstance(data, str):
+        return len(data) + 2
+    if isinstance(data, dict):
+        if len(data) <= MAX_DICT_SIZE:
+            return _estimate_items_size(data.items()) + 2
+        sample = islice(data.items(), SAMPLE_SIZE)
+        return _estimate_items_size(sample) * len(data) // SAMPLE_SIZE + 2
+    if isinstance(data, (list, tuple)):
+        if len(data) <= SAMPLE_SIZE:
+            return sum(estimate_size(item) + 1 for item in data) + 2
+        step = len(data) // SAMPLE_SIZE
+        size = sum(
+            estimate_size(item) + 1 for item in data[::step][:SAMPLE_SIZE]
+        )
+        return size * len(data) // SAMPLE_SIZE + 2
+    # Numbers, booleans, dates and other scalars
+    return 8
+
+
+def _estimate_items_size(items):
+    return sum(
+        estimate_size(key) + estimate_size(value) + 2 for key, value in items
+    )
+
+
+def dumps_in_parts(dumps: Callable[[Any], bytes], data: Any) -> bytes:
+    """Encodes data as compact JSON `dumps` does, calling it for parts of
+    about `PART_SIZE` of large lists and dicts"""
+    out = bytearray()
+    _dump_parts(dumps, data, estimate_size(data), out)
+    return bytes(out)
+
+
+def _dump_parts(dumps, data, size, out):
+    if size <= PART_SIZE or not isinstance(data, (dict, list)) or not data:
+        out += dumps(data)
+        return
+    step = max(1, len(data) * PART_SIZE // size)
+    out += b"[" if isinstance(data, list) else b"{"
+    if step > 1:
+        if isinstance(data, list):
+            parts = (
+                data[start : start + step]
+                for start in range(0, len(data), step)
+            )
+        else:
+            items = iter(data.items())
+            parts = iter(lambda: dict(islice(items, step)), {})
+        for index, part in enumerate(parts):
+            if index:
+                out += b","
+            out += dumps(part)[1:-1]
+    elif isinstance(data, list):
+        for index, item in enumerate(data):
+            if index:
+                out += b","
+            _dump_parts(dumps, item, estimate_size(item), out)
+    else:
+        for index, (key, value) in enumerate(data.items()):
+            if index:
+                out += b","
+            if isinstance(key, str):
+                out += dumps(key)
+                out += b":"
+                _dump_parts(dumps, value, estimate_size(value), out)
+            else:
+                out += dumps({key: value})[1:-1]
+    out += b"]" if isinstance(data, list) else b"}"
+
+
+def loads_in_parts(body: bytes) -> Any:
+    """Parses items of a JSON array or object one by one with the stdlib
+    scanner, other values are parsed at once
+
+    It's two to three times slower than `json.loads`, the price of keeping
+    the GIL for microseconds at a time.
+    """
+    opening = body[:64].lstrip()[:1]
+    if opening not in (b"[", b"{"):
+        return json.loads(body)
+    text = body.decode("utf-8")
+    pos = _skip_whitespace(text, 0).end() + 1
+    try:
+        if opening == b"[":
+            return _loads_array(text, pos)
+        return _loads_object(text, pos)
+    except StopIteration as e:
+        raise json.JSONDecodeError("Expecting value", text, e.value)
+
+
+_scan_once = json.JSONDecoder().scan_once
+_skip_whitespace = json.decoder.WHITESPACE.match
+
+
+def _loads_array(text, pos):
+    items = []
+    pos = _skip_whitespace(text, pos).end()
+    if text[pos : pos + 1] == "]":
+        return _end(text, pos + 1, items)
+    while True:
+        item, pos = _scan_once(text, pos)
+        items.append(item)
+        pos = _next_item(text, pos, "]")
+        if pos is None:
+            return items
+
+
+def _loads_object(text, pos):
+    items = {}
+    pos = _skip_whitespace(text, pos).end()
+    if text[pos : pos + 1] == "}":
+        return _end(text, pos + 1, items)
+    while True:
+        if text[pos : pos + 1] != '"':
+            raise json.JSONDecodeError("Expecting property name", text, pos)
+        key, pos = _scan_once(text, pos)
+        pos = _skip_whitespace(text, pos).end()
+        if text[pos : pos + 1] != ":":
+            raise json.JSONDecodeError("Expecting ':' delimiter", text, pos)
+        pos = _skip_whitespace(text, pos + 1).end()
+        items[key], pos = _scan_once(text, pos)
+        pos = _next_item(text, pos, "}")
+        if pos is None:
+            return items
+
+
+def _next_item(text, pos, closing):
+    """Returns the position of the next item or `None` after the last one"""
+    pos = _skip_whitespace(text, pos).end()
+    delimiter = text[pos : pos + 1]
+    if delimiter == ",":
+        return _skip_whitespace(text, pos + 1).end()
+    if delimiter == closing:
+        _end(text, pos + 1, None)
+        return None
+    raise json.JSONDecodeError(f"Expecting ',' or '{closing}'", text, pos)
+
+
+def _end(text, pos, value):
+    if _skip_whitespace(text, pos).end() != len(text):
+        raise json.JSONDecodeError("Extra data", text, pos)
+    return value
@@ -0,0 +1,126 @@
+"""Stores of request rates for `@rate_limit`
+
+A store has sync `hit(key, count, period)` method and its async `ahit`
+counterpart. It records a request and returns `0` if it's allowed or the
+number of seconds until the next one would be.
+"""
+
+import math
+import re
+import threading
+import time
+from typing import Tuple
+
+from django.core.cache import caches
+
+_UNITS = {"s": 1, "m": 60, "h": 60 * 60, "d": 24 * 60 * 60}
+_RATE = re.compile(r"^(\d+)/(\d*)([smhd])$")
+
+
+def parse_rate(rate: str) -> Tuple[int, int]:
+    """Parses rates like `"100/m"` or `"10/30s"` into `(count, seconds)`"""
+    match = _RATE.match(rate.replace(" ", ""))
+    if not match or not int(match[1]):
+        raise ValueError(f"Invalid rate: {rate!r}")
+    count, multiplier, unit = match.groups()
+    return int(count), int(multiplier or 1) * _UNITS[unit]
+
+
+class TokenBucketStore:
+    """In-process store of token buckets
+
+    A bucket is kept as a single timestamp when it's going to be full again
+    (GCRA), so a full bucket is the same as a missing one. Buckets are spread
+    over `shards` dicts with their own locks, so concurrent requests rarely
+    wait for each other, and full buckets are dropped lazily when a shard
+    grows.
+    """
+
+    def __init__(self, shards: int = 16):
+        self._shards = [_Shard() for _ in range(shards)]
+
+    def hit(self, key: str, count: int, period: float) -> float:
+        shard = self._shards[hash(key) % len(self._shards)]
+        interval = period / count
+        now = time.monotonic()
+        with shard.lock:
+            full_at = max(shard.buckets.get(key, now), now)
+            wait = full_at - now - (period - interval)
+            # Ignores float rounding of the sum of intervals
+            if wait > 1e-6:
+                return wait
+            shard.buckets[key] = full_at + interval
+            if len(shard.buckets) > shard.sweep_size:
+                shard.sweep(now)
+        return 0
+
+    async def ahit(self, key: str, count: int, period: float) -> float:
+        return self.hit(key, count, period)
+
+    def clear(self) -> None:
+        for shard in self._shards:
+            with shard.lock:
+                shard.buckets.clear()
+
+
+class _Shard:
+    MIN_SWEEP_SIZE = 1024
+
+    def __init__(self):
+        self.buckets: dict = {}
+        self.lock = threading.Lock()
+        self.sweep_size = self.MIN_SWEEP_SIZE
+
+    def sweep(self, now):
+        """Drops full buckets, the next sweep happens when the shard doubles"""
+        self.buckets = {
+            key: full_at
+            for key, full_at in self.buckets.items()
+            if full_at > now
+        }
+        self.sweep_size = max(self.MIN_SWEEP_SIZE, 2 * len(self.buckets))
+
+
+class DjangoCacheRateStore:
+    """Store on top of Django's cache framework shared by all workers
+
+    It counts requests in fixed windows of the period with atomic
+    `incr`, so a client can make up to twice the count around a window
+    boundary.
+    """
+
+    def __init__(self, alias: str = "default"):
+        self.alias = alias
+
+    @property
+    def cache(self):
+        return caches[self.alias]
+
+    def hit(self, key: str, count: int, period: float) -> float:
+        window_key, wait = self._window(key, period)
+        self.cache.add(window_key, 0, math.ceil(period))
+        try:
+            hits = self.cache.incr(window_key)
+        except ValueError:
+            # Expired between `add` and `incr`
+            self.cache.add(window_key, 1, math.ceil(period))
+            hits = 1
+        return wait if hits > count else 0
+
+    async def ahit(self, key: str, count: int, period: float) -> float:
+        window_key, wait = self._window(key, period)
+        await self.cache.aadd(window_key, 0, math.ceil(period))
+        try:
+            hits = await self.cache.aincr(window_key)
+        except ValueError:
+            await self.cache.aadd(window_key, 1, math.ceil(period))
+            hits = 1
+        return wait if hits > count else 0
+
+    @staticmethod
+    def _window(key, period):
+        """Returns the cache key of the current window and time until its
+        end"""
+        now = time.time()
+        window = int(now // period)
+        return f"{key}:{window}", (window + 1) * period - now
@@ -0,0 +1,84 @@
+"""Conversion of values JSON doesn't support into ones it does
+
+`default(obj)` is the fallback of JSON backends and codecs. It looks up
+a serializer by the exact type of the value, the serializer is built on the
+first value of the type, so dataclass fields are inspected once and there's no
+chain of `isinstance` checks per value.
+
+QuerySets are fetched as `.values()` dicts in chunks without building model
+instances. On the event loop they can't be, so async views fetch them before
+encoding and nested ones raise `TypeError`.
+"""
+
+import asyncio
+import dataclasses
+import decimal
+import operator
+import uuid
+from typing import Any, Callable, Dict, List
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models.query import ModelIterable, QuerySet
+
+# Rows fetched from the database at once
+CHUNK_SIZE = 2000
+
+
+def default(obj: Any) -> Any:
+    try:
+        serializer = _serializers[type(obj)]
+    except KeyError:
+        serializer = _serializers[type(obj)] = _build_serializer(type(obj))
+    return serializer(obj)
+
+
+_serializers: Dict[type, Callable[[Any], Any]] = {}
+
+
+def _build_serializer(cls: type) -> Callable[[Any], Any]:
+    if dataclasses.is_dataclass(cls):
+        return _dataclass_serializer(cls)
+    if issubclass(cls, QuerySet):
+        return _queryset_serializer
+    if issubclass(cls, (decimal.Decimal, uuid.UUID)):
+        return str
+    return DjangoJSONEncoder().default
+
+
+def _dataclass_serializer(cls: type) -> Callable[[Any], dict]:
+    """Returns a function turning a dataclass into a shallow dict, nested
+    values are serialized by the JSON library itself"""
+    names = tuple(field.name for field in dataclasses.fields(cls))
+    if not names:
+        return lambda obj: {}
+    if len(names) == 1:
+        (name,) = names
+        return lambda obj: {name: getattr(obj, name)}
+    get_values = operator.attrgetter(*names)
+    return lambda obj: dict(zip(names, get_values(obj)))
+
+
+def _queryset_serializer(queryset):
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return queryset_rows(queryset)
+    raise TypeError(
+        "QuerySets of async views are fetched only as the result or values "
+        "of a result dict, fetch nested ones with `aqueryset_rows()`"
+    )
+
+
+def queryset_rows(queryset: QuerySet) -> List[Any]:
+    """Fetches rows of a QuerySet in chunks, model instances are fetched as
+    `.values()` dicts"""
+    if queryset._iterable_class is ModelIterable:
+        queryset = queryset.values()
+    return list(queryset.iterator(chunk_size=CHUNK_SIZE))
+
+
+async def aqueryset_rows(queryset: QuerySet) -> List[Any]:
+    """Async version of `queryset_rows`"""
+    if queryset._iterable_class is ModelIterable:
+        queryset = queryset.values()
+    return [row async for row in queryset.aiterator(chunk_size=CHUNK_SIZE)]
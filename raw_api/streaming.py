@@ -0,0 +1,226 @@
+"""Chunked encoding of generator responses and incremental parsing of
+request bodies
+
+Items are encoded / parsed one by one, so memory usage doesn't depend on the
+number of items
+"""
+
+import codecs
+import json
+from typing import (
+    Any,
+    AsyncIterable,
+    Awaitable,
+    Callable,
+    Iterable,
+    Iterator,
+)
+
+CHUNK_SIZE = 64 * 1024
+
+NDJSON_CONTENT_TYPE = "application/x-ndjson"
+
+
+def json_array_chunks(
+    items: Iterable, dumps: Callable[[Any], bytes]
+) -> Iterable[bytes]:
+    """Encodes items as a JSON array"""
+    chunk, separator = bytearray(b"["), b""
+    for item in items:
+        chunk += separator
+        chunk += dumps(item)
+        separator = b","
+        if len(chunk) >= CHUNK_SIZE:
+            yield bytes(chunk)
+            chunk = bytearray()
+    chunk += b"]"
+    yield bytes(chunk)
+
+
+async def ajson_array_chunks(
+    items: AsyncIterable, dumps: Callable[[Any], bytes]
+) -> AsyncIterable[bytes]:
+    """Encodes items of an async iterable as a JSON array"""
+    chunk, separator = bytearray(b"["), b""
+    async for item in items:
+        chunk += separator
+        chunk += dumps(item)
+        separator = b","
+        if len(chunk) >= CHUNK_SIZE:
+            yield bytes(chunk)
+            chunk = bytearray()
+    chunk += b"]"
+    yield bytes(chunk)
+
+
+def ndjson_chunks(
+    items: Iterable, dumps: Callable[[Any], bytes]
+) -> Iterable[bytes]:
+    """Encodes items as newline delimited JSON"""
+    chunk = bytearray()
+    for item in items:
+        chunk += dumps(item)
+        chunk += b"\n"
+        if len(chunk) >= CHUNK_SIZE:
+            yield bytes(chunk)
+            chunk = bytearray()
+    if chunk:
+        yield bytes(chunk)
+
+
+async def andjson_chunks(
+    items: AsyncIterable, dumps: Callable[[Any], bytes]
+) -> AsyncIterable[bytes]:
+    """Encodes items of an async iterable as newline delimited JSON"""
+    chunk = bytearray()
+    async for item in items:
+        chunk += dumps(item)
+        chunk += b"\n"
+        if len(chunk) >= CHUNK_SIZE:
+            yield bytes(chunk)
+            chunk = bytearray()
+    if chunk:
+        yield bytes(chunk)
+
+
+async def aiter_in_thread(
+    chunks: Iterable[bytes], run: Callable[..., Awaitable]
+) -> AsyncIterable[bytes]:
+    """Pulls chunks of a sync iterable one by one by `run(func, *args)`
+    running functions in a thread, so the event loop isn't blocked by it"""
+    iterator = iter(chunks)
+    while True:
+        chunk = await run(next, iterator, None)
+        if chunk is None:
+            return
+        yield chunk
+
+
+def iter_json(
+    read: Callable[[int], bytes], chunk_size: int = CHUNK_SIZE
+) -> Iterator:
+    """Parses a top-level JSON array or object from a `read` function
+
+    Yields items of an array or `(key, value)` pairs of an object as soon as
+    they're read. Raises `ValueError` on invalid JSON.
+    """
+    return _JsonStreamParser(read, chunk_size).items()
+
+
+_decoder = json.JSONDecoder()
+
+_WHITESPACE = " \t\n\r"
+_DELIMITERS = _WHITESPACE + ",:]}"
+_LITERALS = ("true", "false", "null", "NaN", "Infinity", "-Infinity")
+# Chars a number cut in the middle can go on with
+_NUMBER_CHARS = frozenset("0123456789.eE+-")
+
+
+class _JsonStreamParser:
+    def __init__(self, read, chunk_size):
+        self.read = read
+        self.chunk_size = chunk_size
+        self.decoder = codecs.getincrementaldecoder("utf-8")()
+        self.buffer = ""
+        self.pos = 0
+        self.eof = False
+
+    def items(self):
+        opening = self.peek()
+        if opening not in ("[", "{"):
+            raise ValueError("Expecting a JSON array or object")
+        closing = "]" if opening == "[" else "}"
+        self.pos += 1
+        if self.peek() == closing:
+            self.pos += 1
+        else:
+            while True:
+                if opening == "{":
+                    yield self.pair()
+                else:
+                    self.peek()
+                    yield self.value()
+                delimiter = self.peek()
+                self.pos += 1
+                if delimiter == closing:
+                    break
+                if delimiter != ",":
+                    raise ValueError(f"Expecting ',' or '{closing}'")
+        if self.peek():
+            raise ValueError("Extra data")
+
+    def pair(self):
+        self.peek()
+        key = self.value()
+        if not isinstance(key, str):
+            raise ValueError("Expecting a property name")
+        if self.peek() != ":":
+            raise ValueError("Expecting ':' delimiter")
+        self.pos += 1
+        self.peek()
+        return key, self.value()
+
+    def peek(self) -> str:
+        """Skips whitespaces and returns the next char or `""` at the end"""
+        while True:
+            while (
+                self.pos < len(self.buffer)
+                and self.buffer[self.pos] in _WHITESPACE
+            ):
+                self.pos += 1
+            if self.pos < len(self.buffer):
+                return self.buffer[self.pos]
+            if not self.fill(self.chunk_size):
+                return ""
+
+    def value(self):
+        """Decodes a value starting at the current position
+
+        The value is retried with more data if the buffer ends in the middle
+        of it, as a number or a string could be cut there, other errors are
+        raised at once. The read size is doubled on each retry to keep parsing
+        of large items linear.
+        """
+        size = self.chunk_size
+        while True:
+            try:
+                value, end = _decoder.raw_decode(self.buffer, self.pos)
+            except json.JSONDecodeError as e:
+                if self.eof or not self.is_cut(e):
+                    raise
+            else:
+                if self.eof or not self.is_cut_number(value, end):
+                    self.pos = end
+                    return value
+            self.fill(size)
+            size *= 2
+
+    def is_cut(self, error: json.JSONDecodeError) -> bool:
+        """Returns if the error is caused by the end of the buffer"""
+        rest = self.buffer[error.pos :]
+        if error.msg.startswith("Unterminated string"):
+            return True
+        if error.msg.startswith("Invalid \\uXXXX escape"):
+            return len(rest) <= len("uXXXX")
+        # A number or a literal cut in the middle, maybe of a nested value
+        return all(char in _NUMBER_CHARS for char in rest) or any(
+            literal.startswith(rest) for literal in _LITERALS
+        )
+
+    def is_cut_number(self, value, end) -> bool:
+        """Returns if a number ending at `end` could go on in the next read"""
+        if not isinstance(value, (int, float)) or isinstance(value, bool):
+            return False
+        return all(char in _NUMBER_CHARS for char in self.buffer[end:])
+
+    def fill(self, size) -> bool:
+        """Reads more data into the buffer, returns `False` at the end"""
+        if self.eof:
+            return False
+        data = self.read(size)
+        if not data:
+            self.eof = True
+        text = self.decoder.decode(data, final=self.eof)
+        self.buffer = self.buffer[self.pos :] + text
+        self.pos = 0
+        return not self.eof
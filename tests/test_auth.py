@@ -133,3 +133,45 @@ def test_async_staff_success():
     resp = c.get("/async/require-staff")
     assert resp.status_code == 200
     assert resp.json() == {"user": "staff"}
+
+
+@pytest.mark.django_db
+def test_staff_not_staff():
+    user = get_user_model().objects.get_or_create(
+        username="not_staff", email="not@staff.com"
+    )[0]
+    c = Client()
+    c.force_login(user)
+    resp = c.get("/require-staff")
+    assert resp.status_code == 403
+    assert resp.json() == {"message": "Staff member required"}
+
+
+@pytest.mark.django_db(transaction=True)
+def test_async_staff_not_staff():
+    user = get_user_model().objects.get_or_create(
+        username="not_staff", email="not@staff.com"
+    )[0]
+    c = Client()
+    c.force_login(user)
+    resp = c.get("/async/require-staff")
+    assert resp.status_code == 403
+    assert resp.json() == {"message": "Staff member required"}
+
+
+@pytest.mark.django_db(transaction=True)
+def test_async_user_without_thread_hops(monkeypatch):
+    def sync_to_async(*args, **kwargs):
+        raise AssertionError("sync_to_async shouldn't be used")
+
+    # The fallback loads the user in `sync_executor`
+    monkeypatch.setattr("raw_api.sync_to_async", sync_to_async)
+    monkeypatch.setattr("raw_api.executor.sync_to_async", sync_to_async)
+    user = get_user_model().objects.get_or_create(
+        username="staff", email="some@staff.com", is_staff=True
+    )[0]
+    c = Client()
+    c.force_login(user)
+    resp = c.get("/async/require-staff")
+    assert resp.status_code == 200
+    assert resp.json() == {"user": "staff"}
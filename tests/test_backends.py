@@ -0,0 +1,49 @@
+import datetime
+from decimal import Decimal
+
+import pytest
+
+from raw_api.backends import JsonBackend, get_backend, stdlib_backend
+
+DATA = {"b": [1, 2.5, None], "a": "привет"}
+
+
+@pytest.mark.parametrize("name", ["json", "orjson", "ujson"])
+def test_round_trip(name):
+    pytest.importorskip(name)
+    backend = get_backend(name)
+    for pretty in [False, True]:
+        encoded = backend.dumps(DATA, pretty)
+        assert isinstance(encoded, bytes)
+        assert backend.loads(encoded) == DATA
+
+
+@pytest.mark.parametrize("name", ["json", "orjson", "ujson"])
+def test_django_types(name):
+    pytest.importorskip(name)
+    backend = get_backend(name)
+    encoded = backend.dumps(
+        {"date": datetime.date(2020, 1, 2), "decimal": Decimal("1.5")}
+    )
+    assert backend.loads(encoded) == {"date": "2020-01-02", "decimal": "1.5"}
+
+
+def test_pretty():
+    backend = get_backend("json")
+    assert backend.dumps(DATA) == (
+        b'{"b":[1,2.5,null],'
+        b'"a":"\\u043f\\u0440\\u0438\\u0432\\u0435\\u0442"}'
+    )
+    assert backend.dumps(DATA, True).startswith(b'{\n    "a": "\xd0\xbf')
+
+
+def test_get_backend():
+    assert isinstance(
+        get_backend("raw_api.backends.stdlib_backend"), JsonBackend
+    )
+    assert isinstance(get_backend(stdlib_backend), JsonBackend)
+    backend = stdlib_backend()
+    assert backend.stdlib
+    assert get_backend(backend) is backend
+    with pytest.raises(ValueError):
+        get_backend(object())
@@ -0,0 +1,132 @@
+import pytest
+from django.contrib.auth import get_user_model
+from django.test import Client
+
+
+def _batch(items, client=None):
+    return (client or Client()).post(
+        "/batch", items, content_type="application/json"
+    )
+
+
+def test_batch():
+    resp = _batch(
+        [
+            {"method": "GET", "path": "/dict-response"},
+            {"method": "GET", "path": "/async/string-response"},
+            {
+                "method": "GET",
+                "path": "/query-validation",
+                "query": {"id": "1"},
+            },
+            {"method": "GET", "path": "/async/query-validation"},
+            {"method": "POST", "path": "/json-validation", "body": {"id": 2}},
+            {
+                "method": "POST",
+                "path": "/async/json-validation",
+                "body": {"id": "3"},
+            },
+            {"method": "GET", "path": "/async/tuple-dict-response"},
+            {"method": "GET", "path": "/django-response"},
+            {"method": "GET", "path": "/stream-response"},
+            {"method": "GET", "path": "/not-found"},
+        ]
+    )
+    assert resp.status_code == 200
+    assert resp.json() == [
+        {"status": 200, "body": {"hello": "world"}},
+        {"status": 200, "body": "hey"},
+        {"status": 200, "body": {"id": 1}},
+        {
+            "status": 400,
+            "body": {
+                "message": "Bad request",
+                "errors": {"id": "is required"},
+            },
+        },
+        {"status": 200, "body": {"id": 2}},
+        {"status": 200, "body": {"id": 3}},
+        {"status": 400, "body": {"bad": "request"}},
+        {"status": 200, "body": "foo"},
+        {"status": 200, "body": [{"id": 0}, {"id": 1}, {"id": 2}]},
+        {"status": 404, "body": {"message": "Not found"}},
+    ]
+
+
+@pytest.mark.django_db(transaction=True)
+def test_batch_shares_user():
+    user = get_user_model().objects.get_or_create(username="batch")[0]
+    c = Client()
+    c.force_login(user)
+    resp = _batch(
+        [
+            {"method": "GET", "path": "/require-user"},
+            {"method": "GET", "path": "/async/require-user"},
+            {"method": "GET", "path": "/async/require-staff"},
+        ],
+        c,
+    )
+    assert resp.json() == [
+        {"status": 200, "body": {"user": "batch"}},
+        {"status": 200, "body": {"user": "batch"}},
+        {"status": 403, "body": {"message": "Staff member required"}},
+    ]
+
+
+def test_batch_max_items():
+    resp = _batch([{"method": "GET", "path": "/dict-response"}] * 21)
+    assert resp.status_code == 400
+    assert resp.json() == {
+        "message": "Bad request",
+        "errors": "list length is greater than 20",
+    }
+
+
+def test_batch_invalid_item():
+    resp = _batch([{"method": "FOO", "path": "/dict-response"}])
+    assert resp.status_code == 400
+
+
+def test_nested_batch():
+    resp = _batch(
+        [
+            {
+                "method": "POST",
+                "path": "/batch",
+                "body": [{"method": "GET", "path": "/dict-response"}],
+            }
+        ]
+    )
+    assert resp.json() == [
+        {"status": 400, "body": {"message": "Batch requests can't be nested"}}
+    ]
+
+
+def test_batch_request_headers_arent_inherited():
+    etag = Client().get("/etag-by-content")["ETag"]
+    resp = Client().post(
+        "/batch",
+        [
+            {"method": "GET", "path": "/etag-by-content"},
+            {
+                "method": "POST",
+                "path": "/idempotent-create",
+                "body": {"id": 1},
+            },
+            {
+                "method": "POST",
+                "path": "/idempotent-create",
+                "body": {"id": 2},
+            },
+            {"method": "POST", "path": "/json-limits"},
+        ],
+        content_type="application/json",
+        HTTP_IF_NONE_MATCH=etag,
+        HTTP_IDEMPOTENCY_KEY="batch",
+    )
+    etag_result, first, second, limits = resp.json()
+    assert etag_result == {"status": 200, "body": {"hello": "world"}}
+    assert first["status"] == second["status"] == 201
+    assert first["body"]["id"] == 1 and second["body"]["id"] == 2
+    # No body, not the body of the batch request
+    assert limits["status"] == 400
@@ -0,0 +1,64 @@
+import pytest
+from django.contrib.auth import get_user_model
+from django.test import Client
+
+import views
+from raw_api import LRUStore, _default_cache_store
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    _default_cache_store.clear()
+    views.calls["cached"] = 0
+
+
+@pytest.mark.parametrize("path", ["/cached", "/async/cached"])
+def test_cached_by_validated_query(path):
+    c = Client()
+    assert c.get(f"{path}?id=1").json() == {"id": 1, "calls": 1}
+    resp = c.get(f"{path}?id=01")
+    assert resp["content-type"] == "application/json"
+    assert resp.json() == {"id": 1, "calls": 1}
+    assert c.get(f"{path}?id=2").json() == {"id": 2, "calls": 2}
+
+
+@pytest.mark.parametrize("path", ["/cached", "/async/cached"])
+def test_errors_are_not_cached(path):
+    c = Client()
+    assert c.get(f"{path}?id=foo").status_code == 400
+    assert c.get(path).status_code == 400
+    assert views.calls["cached"] == 0
+
+
+@pytest.mark.django_db(transaction=True)
+@pytest.mark.parametrize(
+    "path", ["/cached-per-user", "/async/cached-per-user"]
+)
+def test_vary_on_user(path):
+    user = get_user_model().objects.get_or_create(username="cached")[0]
+    c = Client()
+    assert c.get(path).json() == {"user": "", "calls": 1}
+    assert c.get(path).json() == {"user": "", "calls": 1}
+    c.force_login(user)
+    assert c.get(path).json() == {"user": "cached", "calls": 2}
+    assert c.get(path).json() == {"user": "cached", "calls": 2}
+
+
+def test_lru_store_eviction():
+    store = LRUStore(max_size=10)
+    store.set("a", b"12345", 60)
+    store.set("b", b"12345", 60)
+    assert store.get("a") == b"12345"
+    store.set("c", b"12345", 60)
+    assert store.get("b") is None
+    assert store.get("a") == b"12345"
+    assert store.size == 10
+    store.set("big", b"x" * 11, 60)
+    assert store.get("big") is None
+
+
+def test_lru_store_expiry():
+    store = LRUStore()
+    store.set("a", b"1", -1)
+    assert store.get("a") is None
+    assert store.size == 0
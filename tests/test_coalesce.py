@@ -0,0 +1,119 @@
+import asyncio
+
+import pytest
+from asgiref.sync import async_to_sync
+from django.test import AsyncClient, Client
+
+import views
+from raw_api import _coalescer, coalesce
+from raw_api.flight import Coalescer
+
+
+@pytest.fixture(autouse=True)
+def reset_calls():
+    views.calls["coalesced"] = 0
+
+
+@async_to_sync
+async def _get_concurrently(*queries):
+    client = AsyncClient(raise_request_exception=False)
+    return await asyncio.gather(
+        *(client.get("/async/coalesced", query) for query in queries),
+    )
+
+
+def test_coalesce():
+    responses = _get_concurrently({"id": 1}, {"id": 1}, {"id": 2})
+    first, second, third = [r.json() for r in responses]
+    assert first == second
+    assert first["id"] == 1 and third["id"] == 2
+    assert views.calls["coalesced"] == 2
+    assert len({id(r) for r in responses}) == 3
+    assert not _coalescer._flights
+
+    # Finished runs aren't reused
+    assert Client().get("/async/coalesced?id=1").json()["calls"] == 3
+
+
+def test_errors_propagate():
+    responses = _get_concurrently({"id": -1}, {"id": -1})
+    assert [r.status_code for r in responses] == [500, 500]
+    assert views.calls["coalesced"] == 1
+
+
+def test_invalid_query_isnt_coalesced():
+    responses = _get_concurrently({"id": "x"}, {"id": "x"})
+    assert [r.status_code for r in responses] == [400, 400]
+    assert views.calls["coalesced"] == 0
+
+
+def test_sync_view():
+    with pytest.raises(TypeError):
+        coalesce()(lambda request: {})
+
+
+@async_to_sync
+async def _cancel_one_waiter():
+    coalescer = Coalescer()
+    runs = []
+
+    async def work():
+        runs.append(1)
+        await asyncio.sleep(0.05)
+        return "done"
+
+    first = asyncio.ensure_future(coalescer.run("key", work))
+    second = asyncio.ensure_future(coalescer.run("key", work))
+    await asyncio.sleep(0)
+    first.cancel()
+    return await second, first.cancelled(), runs
+
+
+def test_cancel_one_waiter():
+    assert _cancel_one_waiter() == (("done", False), True, [1])
+
+
+@async_to_sync
+async def _run_failing():
+    coalescer = Coalescer()
+
+    async def work():
+        await asyncio.sleep(0.01)
+        raise ValueError("Failed")
+
+    return await asyncio.gather(
+        coalescer.run("key", work),
+        coalescer.run("key", work),
+        return_exceptions=True,
+    )
+
+
+def test_error_for_every_waiter():
+    errors = _run_failing()
+    assert [type(e) for e in errors] == [ValueError, ValueError]
+
+
+@async_to_sync
+async def _cancel_all_waiters():
+    coalescer = Coalescer()
+    cancelled = asyncio.Event()
+
+    async def work():
+        try:
+            await asyncio.sleep(1)
+        except asyncio.CancelledError:
+            cancelled.set()
+            raise
+
+    waiters = [
+        asyncio.ensure_future(coalescer.run("key", work)) for _ in range(2)
+    ]
+    await asyncio.sleep(0)
+    for waiter in waiters:
+        waiter.cancel()
+    await asyncio.wait_for(cancelled.wait(), 1)
+    return coalescer._flights
+
+
+def test_cancel_all_waiters():
+    assert _cancel_all_waiters() == {}
@@ -0,0 +1,152 @@
+import datetime
+import decimal
+
+import pytest
+from django.test import Client
+
+from raw_api import _default_cache_store
+from raw_api.codecs import get_codecs
+
+msgpack = pytest.importorskip("msgpack")
+
+MSGPACK = "application/msgpack"
+
+
+@pytest.fixture(autouse=True)
+def codecs(monkeypatch):
+    monkeypatch.setattr("raw_api.CODECS", get_codecs(["msgpack"]))
+
+
+@pytest.mark.parametrize("path", ["/dict-response", "/async/dict-response"])
+def test_response(path):
+    resp = Client().get(path, HTTP_ACCEPT=MSGPACK)
+    assert resp.status_code == 200
+    assert resp["Content-Type"] == MSGPACK
+    assert resp["Vary"] == "Accept"
+    assert msgpack.unpackb(resp.content) == {"hello": "world"}
+
+
+@pytest.mark.parametrize(
+    "accept",
+    [
+        "",
+        "*/*",
+        "application/json",
+        "application/json, application/msgpack;q=0.5",
+        "application/msgpack;q=0, */*",
+        "text/html,application/xhtml+xml,*/*;q=0.8",
+    ],
+)
+def test_json_fallback(accept):
+    resp = Client().get("/dict-response", HTTP_ACCEPT=accept)
+    assert resp["Content-Type"] == "application/json"
+    assert resp["Vary"] == "Accept"
+    assert resp.json() == {"hello": "world"}
+
+
+def test_preferred_by_quality():
+    resp = Client().get(
+        "/dict-response",
+        HTTP_ACCEPT="application/json;q=0.9, application/msgpack",
+    )
+    assert resp["Content-Type"] == MSGPACK
+
+
+@pytest.mark.parametrize("path", ["/request-json", "/async/request-json"])
+def test_request(path):
+    resp = Client().post(path, msgpack.packb({"id": 1}), content_type=MSGPACK)
+    assert resp.status_code == 200
+    assert resp.json() == {"id": 1}
+
+
+@pytest.mark.parametrize(
+    "path", ["/json-validation", "/async/json-validation"]
+)
+def test_validation(path):
+    c = Client()
+    resp = c.post(
+        path,
+        msgpack.packb({"id": "1"}),
+        content_type=MSGPACK,
+        HTTP_ACCEPT=MSGPACK,
+    )
+    assert resp.status_code == 200
+    assert msgpack.unpackb(resp.content) == {"id": 1}
+
+    resp = c.post(
+        path,
+        msgpack.packb({"id": "x"}),
+        content_type=MSGPACK,
+        HTTP_ACCEPT=MSGPACK,
+    )
+    assert resp.status_code == 400
+    assert msgpack.unpackb(resp.content) == {
+        "message": "Bad request",
+        "errors": {"id": "value can't be converted to int"},
+    }
+
+
+def test_invalid_body():
+    resp = Client().post("/request-json", b"\xc1", content_type=MSGPACK)
+    assert resp.status_code == 400
+
+
+def test_json_limits():
+    # Limits apply to parsed data, not the raw bytes
+    resp = Client().post(
+        "/json-limits", msgpack.packb(['"[[[']), content_type=MSGPACK
+    )
+    assert resp.status_code == 200
+
+    resp = Client().post(
+        "/json-limits", msgpack.packb([["x" * 10]]), content_type=MSGPACK
+    )
+    assert resp.status_code == 400
+    assert resp.json() == {
+        "message": "Bad request",
+        "errors": {"max_string_length": "string is longer than 5 bytes"},
+    }
+
+
+def test_batch():
+    resp = Client().post(
+        "/batch",
+        msgpack.packb([{"method": "GET", "path": "/dict-response"}]),
+        content_type=MSGPACK,
+        HTTP_ACCEPT=MSGPACK,
+    )
+    assert resp["Content-Type"] == MSGPACK
+    assert msgpack.unpackb(resp.content) == [
+        {"status": 200, "body": {"hello": "world"}}
+    ]
+
+
+def test_cached_per_format():
+    _default_cache_store.clear()
+    c = Client()
+    resp = c.get("/cached", {"id": 1}, HTTP_ACCEPT=MSGPACK)
+    assert resp["Content-Type"] == MSGPACK
+    resp = c.get("/cached", {"id": 1})
+    assert resp["Content-Type"] == "application/json"
+    assert resp.json()["id"] == 1
+
+
+def test_django_types():
+    codec = get_codecs(["msgpack"])[MSGPACK]
+    data = {"at": datetime.date(2020, 1, 2), "price": decimal.Decimal("1.5")}
+    assert codec.loads(codec.dumps(data)) == {
+        "at": "2020-01-02",
+        "price": "1.5",
+    }
+
+
+def test_cbor():
+    pytest.importorskip("cbor2")
+    codec = get_codecs(["cbor"])["application/cbor"]
+    data = {"id": 1, "tags": ["a"], "at": datetime.date(2020, 1, 2)}
+    assert codec.loads(codec.dumps(data))["tags"] == ["a"]
+
+
+def test_get_codecs_errors():
+    with pytest.raises(ValueError):
+        get_codecs([object()])
@@ -0,0 +1,94 @@
+import json
+
+import pytest
+import trafaret as t
+from django.http import QueryDict
+from trafaret import DataError
+from trafaret.constructor import construct
+
+from raw_api.compiler import compile_encoder, compile_validator
+
+SCHEMAS = [
+    int,
+    [int],
+    {"id": int},
+    {"id": int, "name?": str, "tags": [str], "n": {"x": float, "ok?": bool}},
+    {"pair": (int, str), "kind?": "atom", "any": t.Any},
+]
+
+VALUES = [
+    0,
+    1,
+    True,
+    1.0,
+    1.5,
+    "1",
+    " 2 ",
+    "1.5",
+    "",
+    "foo",
+    None,
+    [],
+    [1, "2"],
+    [1, "x"],
+    {},
+    {"id": "1"},
+    {"id": "x"},
+    {"id": 1, "foo": 2},
+    {"id": 1, "tags": ["a"], "n": {"x": "1.5"}},
+    {"id": 1, "name": "x", "tags": ["a", ""], "n": {"x": 1, "ok": 1}},
+    {"id": 1, "name": "x", "tags": [], "n": {"x": 1, "ok": True}},
+    {"id": 1, "tags": "a", "n": []},
+    {"pair": [1, "a"], "any": None},
+    {"pair": [1, 2], "kind": "atom", "any": 1},
+    {"pair": [1, "a"], "kind": "other"},
+]
+
+
+def _result(validate, value):
+    try:
+        return "ok", validate(value)
+    except DataError as e:
+        return "error", e.as_dict()
+
+
+@pytest.mark.parametrize("schema", SCHEMAS)
+def test_same_as_trafaret(schema):
+    trafaret = construct(schema)
+    compiled = compile_validator(schema)
+    for value in VALUES:
+        assert _result(compiled, value) == _result(trafaret, value), value
+
+
+def test_query_dict():
+    compiled = compile_validator({"id": int, "q?": str})
+    assert compiled(QueryDict("id=1&id=2&q=x")) == {"id": 2, "q": "x"}
+    with pytest.raises(DataError) as e:
+        compiled(QueryDict("id=1&foo=bar"))
+    assert e.value.as_dict() == {"foo": "foo is not allowed key"}
+
+
+def test_trafaret_is_returned_as_is():
+    trafaret = t.Dict({"id": t.Int()})
+    assert compile_validator(trafaret) is trafaret
+
+
+_dumps = json.JSONEncoder(separators=(",", ":")).encode
+
+
+@pytest.mark.parametrize("schema", SCHEMAS)
+def test_encoder_same_as_json(schema):
+    encode = compile_encoder(schema, _dumps)
+    for value in VALUES + [float("nan"), {"id": float("inf")}, {"id": 2**70}]:
+        assert _canonical(encode(value)) == _canonical(_dumps(value)), value
+
+
+def _canonical(encoded):
+    return json.dumps(json.loads(encoded), sort_keys=True)
+
+
+def test_encoder_key_order_and_escaping():
+    encode = compile_encoder({"c?": int, "b": str, "a'{\\}\"?": [int]}, _dumps)
+    assert encode({"a'{\\}\"": [1], "b": "\u043f", "c": 1}) == (
+        b'{"c":1,"b":"\\u043f","a\'{\\\\}\\"":[1]}'
+    )
@@ -0,0 +1,77 @@
+import gzip
+import json
+
+import pytest
+from django.test import Client
+
+from raw_api.compression import accepts_gzip
+
+from test_streaming import _async_get
+
+
+@pytest.fixture(autouse=True)
+def compress(monkeypatch):
+    monkeypatch.setattr("raw_api.COMPRESS", True)
+
+
+def test_large_response_is_compressed():
+    resp = Client().get("/large-response", HTTP_ACCEPT_ENCODING="gzip")
+    assert resp["Content-Encoding"] == "gzip"
+    assert resp["Vary"] == "Accept-Encoding"
+    assert int(resp["Content-Length"]) == len(resp.content)
+    assert json.loads(gzip.decompress(resp.content)) == {
+        "items": list(range(1000))
+    }
+
+
+def test_not_accepted():
+    resp = Client().get("/large-response", HTTP_ACCEPT_ENCODING="gzip;q=0")
+    assert not resp.has_header("Content-Encoding")
+    assert resp["Vary"] == "Accept-Encoding"
+    assert resp.json() == {"items": list(range(1000))}
+
+
+def test_small_response_is_not_compressed():
+    resp = Client().get("/dict-response", HTTP_ACCEPT_ENCODING="gzip")
+    assert not resp.has_header("Content-Encoding")
+    assert resp.json() == {"hello": "world"}
+
+
+def test_stream_is_compressed():
+    resp = Client().get(
+        "/stream-response?count=20000", HTTP_ACCEPT_ENCODING="gzip"
+    )
+    assert resp["Content-Encoding"] == "gzip"
+    chunks = list(resp.streaming_content)
+    assert len(chunks) > 1
+    items = json.loads(gzip.decompress(b"".join(chunks)))
+    assert len(items) == 20000
+
+
+def test_async_stream_is_compressed():
+    resp, content = _async_get(
+        "/async/stream-response", headers={"accept-encoding": "gzip"}
+    )
+    assert resp["Content-Encoding"] == "gzip"
+    assert json.loads(gzip.decompress(content)) == [
+        {"id": 0},
+        {"id": 1},
+        {"id": 2},
+    ]
+
+
+@pytest.mark.parametrize(
+    "header, accepts",
+    [
+        ("", False),
+        ("gzip", True),
+        ("deflate, gzip;q=0.5", True),
+        ("GZIP", True),
+        ("gzip;q=0", False),
+        ("*", True),
+        ("*;q=0, gzip", True),
+        ("br, deflate", False),
+    ],
+)
+def test_accepts_gzip(header, accepts):
+    assert accepts_gzip(header) is accepts
@@ -1,4 +1,6 @@
-from django.test import Client
+from django.test import Client, RequestFactory
+
+from raw_api import _add_json_property
 
 
 def test_dict_response():
@@ -117,3 +119,29 @@ def test_async_correct_json_request():
     )
     assert resp.status_code == 200
     assert resp.json() == {"foo": 1}
+
+
+def test_json_property_class_is_reused():
+    factory = RequestFactory()
+    first = factory.post("/", b'{"a": 1}', content_type="application/json")
+    second = factory.post("/", b'{"b": 2}', content_type="application/json")
+    _add_json_property(first)
+    _add_json_property(second)
+    assert type(first) is type(second)
+    assert first.json == {"a": 1}
+    assert second.json == {"b": 2}
+    second.json = {"c": 3}
+    assert second.json == {"c": 3}
+    assert first.json == {"a": 1}
+
+
+def test_compact_json_response():
+    resp = Client().get("/dict-response")
+    assert resp.content == b'{"hello":"world"}'
+
+
+def test_pretty_json_response():
+    resp = Client().get(
+        "/dict-response", HTTP_ACCEPT="application/json; indent=4"
+    )
+    assert resp.content == b'{\n    "hello": "world"\n}'
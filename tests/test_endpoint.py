@@ -0,0 +1,71 @@
+import pytest
+from django.contrib.auth import get_user_model
+from django.test import Client
+
+from raw_api import endpoint
+
+
+def _client(user=None):
+    c = Client()
+    if user is not None:
+        c.force_login(user)
+    return c
+
+
+REQUESTS = [
+    ("get", "?id=1", None),
+    ("post", "?id=1", {"name": "x"}),
+    ("post", "?id=x", {"name": "x"}),
+    ("post", "?id=1", {"name": 1}),
+    ("post", "", {}),
+]
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("prefix", ["", "/async"])
+@pytest.mark.parametrize("who", [None, "user", "staff"])
+def test_same_as_stacked(prefix, who):
+    user = None
+    if who is not None:
+        user = get_user_model().objects.create(
+            username=who, is_staff=who == "staff"
+        )
+    c = _client(user)
+    statuses = []
+    for method, query, data in REQUESTS:
+        responses = [
+            getattr(c, method)(
+                f"{prefix}/{name}-endpoint{query}",
+                data,
+                content_type="application/json",
+            )
+            for name in ("stacked", "fused")
+        ]
+        stacked, fused = responses
+        assert fused.status_code == stacked.status_code, (method, query)
+        assert fused.json() == stacked.json(), (method, query)
+        statuses.append(fused.status_code)
+    if who == "staff":
+        assert statuses == [405, 200, 400, 400, 400]
+    else:
+        assert statuses == [403] * len(REQUESTS)
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize(
+    "path", ["/user-get-endpoint", "/async/user-get-endpoint"]
+)
+def test_methods(path):
+    c = _client(get_user_model().objects.create(username="bob"))
+    assert c.get(path).json() == {"user": "bob"}
+    resp = c.post(path)
+    assert resp.status_code == 405
+    assert resp.json() == {"message": "Method not allowed"}
+    # The method is checked before the user
+    assert Client().post(path).status_code == 405
+    assert Client().get(path).status_code == 403
+
+
+def test_invalid_auth():
+    with pytest.raises(ValueError):
+        endpoint(auth="admin")
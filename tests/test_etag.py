@@ -0,0 +1,47 @@
+import pytest
+from django.test import Client
+
+import views
+
+
+@pytest.mark.parametrize(
+    "path", ["/etag-by-content", "/async/etag-by-content"]
+)
+def test_etag_by_content(path):
+    c = Client()
+    resp = c.get(path)
+    assert resp.status_code == 200
+    tag = resp["ETag"]
+    resp = c.get(path, HTTP_IF_NONE_MATCH=tag)
+    assert resp.status_code == 304
+    assert resp.content == b""
+    assert resp["ETag"] == tag
+    resp = c.get(path, HTTP_IF_NONE_MATCH='"other"')
+    assert resp.status_code == 200
+    assert resp.json() == {"hello": "world"}
+
+
+@pytest.mark.parametrize(
+    "path", ["/etag-by-version", "/async/etag-by-version"]
+)
+def test_etag_by_version(path):
+    views.versions["etag"] = "1"
+    views.calls["etag"] = 0
+    c = Client()
+    resp = c.get(path)
+    assert resp.status_code == 200
+    assert resp["ETag"] == '"1"'
+    resp = c.get(path, HTTP_IF_NONE_MATCH='"1"')
+    assert resp.status_code == 304
+    assert views.calls["etag"] == 1
+    views.versions["etag"] = "2"
+    resp = c.get(path, HTTP_IF_NONE_MATCH='"1"')
+    assert resp.status_code == 200
+    assert resp["ETag"] == '"2"'
+    assert resp.json() == {"version": "2"}
+    assert views.calls["etag"] == 2
+
+
+def test_no_etag_by_default():
+    resp = Client().get("/dict-response")
+    assert not resp.has_header("ETag")
@@ -0,0 +1,130 @@
+import asyncio
+import json
+
+import pytest
+from asgiref.sync import async_to_sync
+from django.contrib.auth import get_user_model
+from django.test import AsyncClient, Client
+
+import views
+from raw_api.executor import ExecutorSaturated, SyncExecutor
+
+
+@pytest.fixture(autouse=True)
+def reset_work():
+    views.sync_work_started.clear()
+    views.sync_work_release.clear()
+    yield
+    views.sync_work_release.set()
+
+
+@pytest.fixture
+def executor(monkeypatch):
+    executor = SyncExecutor(threads=1, thread_sensitive=False, max_queue=0)
+    monkeypatch.setattr("raw_api.sync_executor", executor)
+    return executor
+
+
+def test_run():
+    executor = SyncExecutor(threads=2, thread_sensitive=False)
+    timings = {}
+    result = async_to_sync(executor.run)(
+        views._blocking_work, 0, timings=timings
+    )
+    assert result.startswith("raw_api_sync")
+    assert set(timings) == {"sync_wait", "sync_run"}
+    stats = executor.stats()
+    assert stats["calls"] == 1
+    assert stats["pending"] == stats["rejected"] == 0
+    assert stats["wait_ns"] == timings["sync_wait"]
+    assert stats["run_ns"] == timings["sync_run"]
+
+
+def test_thread_sensitive():
+    executor = SyncExecutor()
+    result = async_to_sync(executor.run)(views._blocking_work, 0)
+    assert not result.startswith("raw_api_sync")
+
+
+@async_to_sync
+async def _run_while_busy(executor):
+    busy = asyncio.ensure_future(executor.run(views._blocking_work, 1))
+    await asyncio.sleep(0)
+    try:
+        with pytest.raises(ExecutorSaturated):
+            await executor.run(views._blocking_work, 0)
+    finally:
+        views.sync_work_release.set()
+        await busy
+
+
+def test_saturated():
+    executor = SyncExecutor(threads=1, thread_sensitive=False, max_queue=0)
+    _run_while_busy(executor)
+    stats = executor.stats()
+    assert stats["calls"] == 1
+    assert stats["rejected"] == 1
+    assert stats["pending"] == 0
+
+
+@async_to_sync
+async def _get_while_busy():
+    client = AsyncClient()
+    busy = asyncio.ensure_future(client.get("/async/sync-work?seconds=1"))
+    while not views.sync_work_started.is_set():
+        await asyncio.sleep(0.001)
+    try:
+        return await client.get("/async/sync-work?seconds=0")
+    finally:
+        views.sync_work_release.set()
+        await busy
+
+
+def test_view(executor):
+    resp = Client().get("/async/sync-work?seconds=0")
+    assert resp.json()["thread"].startswith("raw_api_sync")
+
+
+def test_view_saturated(executor):
+    resp = _get_while_busy()
+    assert resp.status_code == 503
+    assert resp.json() == {"message": "Service unavailable"}
+    assert executor.stats()["rejected"] == 1
+
+
+def test_view_timing(executor, monkeypatch):
+    monkeypatch.setattr("raw_api.TIMING", True)
+    resp = Client().get("/async/sync-work?seconds=0")
+    stages = [item.split(";")[0] for item in resp["Server-Timing"].split(", ")]
+    assert "sync_wait" in stages and "sync_run" in stages
+
+
+def test_sync_callbacks(executor):
+    views.callback_threads.clear()
+    assert Client().get("/async/sync-callbacks").status_code == 200
+    assert len(views.callback_threads) == 2
+    assert all(
+        name.startswith("raw_api_sync") for name in views.callback_threads
+    )
+
+
+@async_to_sync
+async def _get_stream():
+    resp = await AsyncClient().get("/stream-response")
+    return b"".join([chunk async for chunk in resp.streaming_content])
+
+
+def test_sync_stream(executor):
+    assert json.loads(_get_stream()) == [{"id": 0}, {"id": 1}, {"id": 2}]
+    # A chunk and the end of the stream
+    assert executor.stats()["calls"] == 2
+
+
+@pytest.mark.django_db(transaction=True)
+def test_user_loaded_in_executor(executor):
+    user = get_user_model().objects.get_or_create(username="user")[0]
+    c = Client()
+    c.force_login(user)
+    resp = c.get("/async/require-user")
+    assert resp.json() == {"user": "user"}
+    assert executor.stats()["calls"] == 1
@@ -0,0 +1,142 @@
+import asyncio
+import json
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from asgiref.sync import async_to_sync
+from django.contrib.auth import get_user_model
+from django.test import AsyncClient, Client
+
+import views
+from raw_api import DjangoCacheStore, _default_idempotency_store, _in_flight
+
+PATHS = ["/idempotent-create", "/async/idempotent-create"]
+
+
+@pytest.fixture(autouse=True)
+def clear_store():
+    _default_idempotency_store.clear()
+    views.calls["idempotent"] = 0
+
+
+def _post(path, data, key="key", client=None):
+    headers = {"HTTP_IDEMPOTENCY_KEY": key} if key else {}
+    return (client or Client()).post(
+        path, json.dumps(data), content_type="application/json", **headers
+    )
+
+
+@pytest.mark.parametrize("path", PATHS)
+def test_replay(path):
+    resp = _post(path, {"id": 1})
+    assert resp.status_code == 201
+    assert resp.json() == {"id": 1, "calls": 1}
+    assert "Idempotent-Replayed" not in resp
+
+    resp = _post(path, {"id": 1})
+    assert resp.status_code == 201
+    assert resp.json() == {"id": 1, "calls": 1}
+    assert resp["Idempotent-Replayed"] == "true"
+
+    assert _post(path, {"id": 1}, key="other").json()["calls"] == 2
+    assert _post(path, {"id": 1}, key=None).json()["calls"] == 3
+
+
+@pytest.mark.parametrize("path", PATHS)
+def test_another_body(path):
+    _post(path, {"id": 1})
+    resp = _post(path, {"id": 2})
+    assert resp.status_code == 422
+    assert resp.json() == {
+        "message": "Idempotency-Key is already used for another request"
+    }
+
+
+@pytest.mark.parametrize("path", PATHS)
+def test_errors(path):
+    assert _post(path, {"id": "x"}).status_code == 400
+    assert _post(path, {"id": "x"})["Idempotent-Replayed"] == "true"
+    assert _post(path, {"id": -1}, key="5xx").status_code == 500
+    assert _post(path, {"id": -1}, key="5xx").status_code == 500
+    assert views.calls["idempotent"] == 2
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("path", PATHS)
+def test_per_user(path):
+    c = Client()
+    c.force_login(get_user_model().objects.create(username="one"))
+    assert _post(path, {"id": 1}, client=c).json()["calls"] == 1
+    assert _post(path, {"id": 1}, client=c).json()["calls"] == 1
+    assert _post(path, {"id": 1}).json()["calls"] == 2
+
+
+def test_concurrent_duplicates():
+    with ThreadPoolExecutor(3) as executor:
+        responses = list(
+            executor.map(
+                lambda _: _post("/idempotent-create", {"id": 1, "sleep": 0.2}),
+                range(3),
+            )
+        )
+    assert [r.json()["calls"] for r in responses] == [1, 1, 1]
+    assert sorted(r.has_header("Idempotent-Replayed") for r in responses) == [
+        False,
+        True,
+        True,
+    ]
+    assert not _in_flight._futures
+
+
+@async_to_sync
+async def _async_post_concurrently(path, data, times):
+    client = AsyncClient()
+    return await asyncio.gather(
+        *(
+            client.post(
+                path,
+                json.dumps(data),
+                content_type="application/json",
+                headers={"Idempotency-Key": "key"},
+            )
+            for _ in range(times)
+        )
+    )
+
+
+def test_async_concurrent_duplicates():
+    responses = _async_post_concurrently(
+        "/async/idempotent-create", {"id": 1, "sleep": 0.1}, 3
+    )
+    assert [r.json()["calls"] for r in responses] == [1, 1, 1]
+    assert views.calls["idempotent"] == 1
+    assert not _in_flight._futures
+
+
+def test_django_cache_store(monkeypatch):
+    monkeypatch.setattr(
+        "raw_api._default_idempotency_store", DjangoCacheStore()
+    )
+    for path in PATHS:
+        assert _post(path, {"id": 1}, key=path).json()["calls"] == 1
+        assert _post(path, {"id": 1}, key=path).json()["calls"] == 1
+        views.calls["idempotent"] = 0
+
+
+class FailingStore(DjangoCacheStore):
+    def get(self, key):
+        raise ConnectionError
+
+    async def aget(self, key):
+        raise ConnectionError
+
+
+@pytest.mark.parametrize("path", PATHS)
+def test_store_error(path, monkeypatch):
+    monkeypatch.setattr("raw_api._default_idempotency_store", FailingStore())
+    with pytest.raises(ConnectionError):
+        _post(path, {"id": 1})
+    # The key isn't left owned, so retries don't wait for it forever
+    assert not _in_flight._futures
+    monkeypatch.undo()
+    assert _post(path, {"id": 1}).json()["calls"] == 1
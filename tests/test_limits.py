@@ -0,0 +1,92 @@
+import pytest
+from django.test import Client
+
+from raw_api.limits import JsonLimits, check_data, check_json
+
+PATHS = ["/json-limits", "/async/json-limits"]
+
+
+def _post(path, data):
+    return Client().post(path, data, content_type="application/json")
+
+
+@pytest.mark.parametrize("path", PATHS)
+def test_within_limits(path):
+    resp = _post(path, [1, {"a": [2]}, "abcde"])
+    assert resp.status_code == 200
+    assert resp.json() == {"items": [1, {"a": [2]}, "abcde"]}
+
+
+@pytest.mark.parametrize("path", PATHS)
+def test_body_size(path):
+    resp = _post(path, [1] * 50)
+    assert resp.status_code == 413
+    assert resp.json() == {
+        "message": "Payload too large",
+        "errors": {"max_body_size": "body is larger than 100 bytes"},
+    }
+
+
+@pytest.mark.parametrize(
+    "data, error",
+    [
+        ([[[[1]]]], {"max_depth": "nesting depth is greater than 3"}),
+        (
+            [{"a": 1, "b": 2}, {"c": 3, "d": 4}],
+            {"max_keys": "number of keys is greater than 3"},
+        ),
+        (["abcdef"], {"max_string_length": "string is longer than 5 bytes"}),
+    ],
+)
+@pytest.mark.parametrize("path", PATHS)
+def test_structure(path, data, error):
+    resp = _post(path, data)
+    assert resp.status_code == 400
+    assert resp.json() == {"message": "Bad request", "errors": error}
+
+
+@pytest.mark.parametrize(
+    "body, error",
+    [
+        (
+            b'["[[[[", "{:::::}"]',
+            {"max_string_length": "string is longer than 5 bytes"},
+        ),
+        (b'["[[[", "{::::"]', None),
+        (b'["\\"[[[", "\\\\"]', None),
+        (
+            b'["\\\\", [[[1]]]]',
+            {"max_depth": "nesting depth is greater than 3"},
+        ),
+        (
+            b'{"a\\"b": 1, "\\"": {"c": 2, "d": 3}}',
+            {"max_keys": "number of keys is greater than 3"},
+        ),
+    ],
+)
+def test_check_json_strings(body, error):
+    limits = JsonLimits(max_depth=3, max_keys=3, max_string_length=5)
+    assert check_json(limits, body) == error
+
+
+@pytest.mark.parametrize(
+    "data, error",
+    [
+        ([1, {"a": [2]}, "abcde"], None),
+        ([[[[1]]]], {"max_depth": "nesting depth is greater than 3"}),
+        (
+            [{"a": 1, "b": 2}, {"c": 3, "d": 4}],
+            {"max_keys": "number of keys is greater than 3"},
+        ),
+        (["abcdef"], {"max_string_length": "string is longer than 5 bytes"}),
+        (
+            [{"abcdef": 1}],
+            {"max_string_length": "string is longer than 5 bytes"},
+        ),
+        (["ééé"], {"max_string_length": "string is longer than 5 bytes"}),
+        ([b"abcdef"], {"max_string_length": "string is longer than 5 bytes"}),
+    ],
+)
+def test_check_data(data, error):
+    limits = JsonLimits(max_depth=3, max_keys=3, max_string_length=5)
+    assert check_data(limits, data) == error
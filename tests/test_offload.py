@@ -0,0 +1,153 @@
+import json
+
+import pytest
+from asgiref.sync import async_to_sync
+from django.test import AsyncClient, Client
+
+import raw_api
+from raw_api import offload
+
+
+@pytest.fixture
+def offloaded(monkeypatch):
+    """Lowers the threshold and records names of offloaded functions"""
+    offloaded = []
+    offload = raw_api._offload
+
+    async def recording_offload(func, *args):
+        offloaded.append(getattr(func, "__name__", None))
+        return await offload(func, *args)
+
+    monkeypatch.setattr("raw_api.OFFLOAD_SIZE", 100)
+    monkeypatch.setattr("raw_api._offload", recording_offload)
+    return offloaded
+
+
+@pytest.mark.parametrize(
+    "data",
+    [
+        "x" * 100,
+        [{"id": i, "name": "x" * 20} for i in range(1000)],
+        {"count": 3, "next": None, "results": ["x" * 100] * 100},
+        {str(i): [i, None, True] for i in range(1000)},
+    ],
+)
+def test_estimate_size(data):
+    size = len(json.dumps(data, separators=(",", ":")))
+    assert size / 2 < offload.estimate_size(data) < size * 2
+
+
+@async_to_sync
+async def _async_post(path, data):
+    return await AsyncClient().post(path, data, "application/json")
+
+
+def test_ajson(offloaded):
+    resp = _async_post("/async/ajson", {"id": 1})
+    assert resp.json() == {"json": {"id": 1}}
+    assert offloaded == []
+
+    data = {"ids": list(range(100))}
+    resp = _async_post("/async/ajson", data)
+    assert resp.json() == {"json": data}
+    assert offloaded == ["_load_json", "_finalize_large_response"]
+
+
+def test_ajson_wsgi(offloaded):
+    # Responses of the sync middleware are encoded in the request thread
+    data = {"ids": list(range(100))}
+    resp = Client().post("/async/ajson", data, "application/json")
+    assert resp.json() == {"json": data}
+    assert offloaded == ["_load_json"]
+
+
+def test_ajson_invalid(offloaded):
+    resp = Client().post(
+        "/async/ajson", b"[" * 200, content_type="application/json"
+    )
+    assert resp.status_code == 400
+    assert offloaded == ["_load_json"]
+
+
+def test_validate_json(offloaded):
+    body = {"id": 10**200}
+    resp = _async_post("/async/json-validation", body)
+    assert resp.json() == body
+    assert offloaded == ["_get_json_error"]
+
+    resp = Client().post("/json-validation", body, "application/json")
+    assert resp.json() == body
+    assert offloaded == ["_get_json_error"]
+
+
+def test_streaming_response(offloaded):
+    resp = Client().get("/async/stream-response?count=20")
+    assert resp.streaming
+    assert offloaded == []
+
+
+def test_returns(offloaded, monkeypatch):
+    monkeypatch.setattr("raw_api.OFFLOAD_SIZE", 10)
+    resp = Client().get("/async/typed-response")
+    assert resp.json() == {"id": 1, "name": "a", "tags": ["x"]}
+    assert offloaded == ["_encode_result"]
+
+
+def test_disabled(offloaded, monkeypatch):
+    monkeypatch.setattr("raw_api.OFFLOAD_SIZE", None)
+    data = {"ids": list(range(100))}
+    resp = Client().post("/async/ajson", data, "application/json")
+    assert resp.json() == {"json": data}
+    assert offloaded == []
+
+
+PAYLOADS = [
+    [{"id": i, "name": "x" * 20, "tags": ["a"]} for i in range(500)],
+    {"count": 2, "results": [[str(i), i] for i in range(500)]},
+    {str(i): {"id": i} for i in range(500)},
+    {1: "x" * 1000, "ids": [None] * 500},
+    ["x" * 1000, [], {}],
+    [],
+    5,
+]
+
+
+@pytest.mark.parametrize("data", PAYLOADS)
+def test_dumps_in_parts(monkeypatch, data):
+    monkeypatch.setattr("raw_api.offload.PART_SIZE", 100)
+    dumps = raw_api._compact_json_dumps
+    assert offload.dumps_in_parts(dumps, data) == dumps(data)
+
+
+@pytest.mark.parametrize("data", PAYLOADS)
+@pytest.mark.parametrize("indent", [None, 2])
+def test_loads_in_parts(data, indent):
+    body = json.dumps(data, indent=indent).encode()
+    assert offload.loads_in_parts(body) == json.loads(body)
+
+
+@pytest.mark.parametrize(
+    "body",
+    [
+        b"[",
+        b"[1,]",
+        b"[1 2]",
+        b"[1]]",
+        b"{",
+        b'{"a":1,}',
+        b'{"a" 1}',
+        b"{1:2}",
+    ],
+)
+def test_loads_in_parts_invalid(body):
+    with pytest.raises(ValueError):
+        offload.loads_in_parts(body)
+
+
+def test_timing(offloaded, monkeypatch):
+    monkeypatch.setattr("raw_api.TIMING", True)
+    data = {"ids": list(range(100))}
+    resp = _async_post("/async/ajson", data)
+    assert resp.json() == {"json": data}
+    assert "serialization" in resp["Server-Timing"]
+    assert offloaded == ["_load_json", "_timed_finalize_response"]
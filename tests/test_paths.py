@@ -0,0 +1,31 @@
+import pytest
+from asgiref.sync import async_to_sync
+from django.test import AsyncClient, Client
+
+
+@pytest.fixture(autouse=True)
+def paths(monkeypatch):
+    monkeypatch.setattr("raw_api.PATHS", ("/async/",))
+    monkeypatch.setattr("raw_api.TIMING", True)
+
+
+def test_in_scope():
+    resp = Client().get("/async/django-response")
+    assert resp.has_header("Server-Timing")
+    assert Client().get("/async/dict-response").json() == {"hello": "world"}
+
+
+def test_out_of_scope():
+    resp = Client().get("/django-response")
+    assert resp.status_code == 200
+    assert not resp.has_header("Server-Timing")
+
+
+@async_to_sync
+async def _async_get(path):
+    return await AsyncClient().get(path)
+
+
+def test_async_middleware():
+    assert _async_get("/async/django-response").has_header("Server-Timing")
+    assert not _async_get("/django-response").has_header("Server-Timing")
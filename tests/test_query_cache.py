@@ -0,0 +1,56 @@
+import pytest
+from django.test import Client
+
+import views
+
+VIEWS = [
+    ("/memoized-query", views.memoized_query),
+    ("/async/memoized-query", views.async_memoized_query),
+]
+
+
+@pytest.fixture(autouse=True)
+def clear_caches():
+    for _, view in VIEWS:
+        view.cache_clear()
+
+
+@pytest.mark.parametrize("path, view", VIEWS)
+def test_memoized(path, view):
+    c = Client()
+    for _ in range(3):
+        resp = c.get(f"{path}?id=1&q=x")
+        assert resp.json() == {"query": {"id": 1, "q": "x"}, "read_only": True}
+    info = view.cache_info()
+    assert (info.hits, info.misses, info.maxsize, info.currsize) == (
+        2,
+        1,
+        2,
+        1,
+    )
+
+
+@pytest.mark.parametrize("path, view", VIEWS)
+def test_errors_are_memoized(path, view):
+    c = Client()
+    for _ in range(2):
+        resp = c.get(f"{path}?id=x")
+        assert resp.status_code == 400
+        assert resp.json() == {
+            "message": "Bad request",
+            "errors": {"id": "value can't be converted to int"},
+        }
+    assert view.cache_info().hits == 1
+
+
+@pytest.mark.parametrize("path, view", VIEWS)
+def test_bounded(path, view):
+    c = Client()
+    for query in ["id=1", "id=2", "id=3", "id=1"]:
+        assert c.get(f"{path}?{query}").status_code == 200
+    info = view.cache_info()
+    assert (info.hits, info.misses, info.currsize) == (0, 4, 2)
+
+
+def test_not_memoized_by_default():
+    assert not hasattr(views.query_validation, "cache_info")
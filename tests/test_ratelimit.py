@@ -0,0 +1,116 @@
+import pytest
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client
+
+from raw_api import _default_rate_store, rate_limit
+from raw_api.ratelimit import TokenBucketStore, parse_rate
+
+
+@pytest.fixture(autouse=True)
+def clear_stores():
+    _default_rate_store.clear()
+    cache.clear()
+
+
+@pytest.mark.parametrize(
+    "path",
+    [
+        "/rate-limited",
+        "/async/rate-limited",
+        "/rate-limited-in-cache",
+        "/async/rate-limited-in-cache",
+    ],
+)
+def test_rate_limit(path):
+    c = Client()
+    assert c.get(path).status_code == 200
+    assert c.get(path).status_code == 200
+    resp = c.get(path)
+    assert resp.status_code == 429
+    assert resp.json() == {"message": "Too many requests"}
+    assert 0 < int(resp["Retry-After"]) <= 60
+    assert Client(REMOTE_ADDR="127.0.0.2").get(path).status_code == 200
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize(
+    "path", ["/rate-limited-per-user", "/async/rate-limited-per-user"]
+)
+def test_per_user(path):
+    users = get_user_model().objects
+    c1, c2 = Client(), Client()
+    c1.force_login(users.create(username="one"))
+    c2.force_login(users.create(username="two"))
+    assert c1.get(path).status_code == 200
+    assert c1.get(path).status_code == 429
+    assert c2.get(path).status_code == 200
+    assert Client().get(path).status_code == 200
+    assert Client().get(path).status_code == 429
+
+
+@pytest.mark.parametrize(
+    "path", ["/rate-limited-by-token", "/async/rate-limited-by-token"]
+)
+def test_key_callback(path):
+    c = Client()
+    assert c.get(path, {"token": "a"}).status_code == 200
+    assert c.get(path, {"token": "a"}).status_code == 429
+    assert c.get(path, {"token": "b"}).status_code == 200
+    # `None` key isn't limited
+    assert c.get(path).status_code == 200
+    assert c.get(path).status_code == 200
+
+
+def test_token_bucket_refill(monkeypatch):
+    now = 1000.0
+    monkeypatch.setattr("time.monotonic", lambda: now)
+    store = TokenBucketStore()
+    assert [store.hit("k", 3, 60) for _ in range(3)] == [0, 0, 0]
+    assert store.hit("k", 3, 60) == pytest.approx(20)
+    now += 20
+    assert store.hit("k", 3, 60) == 0
+    assert store.hit("k", 3, 60) == pytest.approx(20)
+
+
+@pytest.mark.parametrize(
+    "path", ["/rate-limited-per-user", "/async/rate-limited-per-user"]
+)
+def test_first_request_float_rounding(path, monkeypatch):
+    now = 32757.118
+    # A naive `now + interval - now - period` leaves a tiny positive wait
+    assert now + 60.0 - now - 60.0 > 0
+    monkeypatch.setattr("time.monotonic", lambda: now)
+    c = Client()
+    assert c.get(path).status_code == 200
+    assert c.get(path).status_code == 429
+
+
+def test_token_bucket_sweep(monkeypatch):
+    now = 1000.0
+    monkeypatch.setattr("time.monotonic", lambda: now)
+    store = TokenBucketStore(shards=1)
+    for i in range(1024):
+        store.hit(str(i), 1, 1)
+    now += 2
+    store.hit("new", 1, 1)
+    assert list(store._shards[0].buckets) == ["new"]
+
+
+@pytest.mark.parametrize(
+    "rate, parsed",
+    [("100/m", (100, 60)), ("10/30s", (10, 30)), ("5 / h", (5, 3600))],
+)
+def test_parse_rate(rate, parsed):
+    assert parse_rate(rate) == parsed
+
+
+@pytest.mark.parametrize("rate", ["100", "0/m", "1/w", "-1/s"])
+def test_invalid_rate(rate):
+    with pytest.raises(ValueError):
+        parse_rate(rate)
+
+
+def test_invalid_key():
+    with pytest.raises(ValueError):
+        rate_limit("1/s", key="session")
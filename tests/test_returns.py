@@ -0,0 +1,58 @@
+import json
+
+import pytest
+from django.test import Client
+from trafaret import DataError
+
+import views
+from raw_api.backends import JsonBackend, get_backend
+
+PATHS = ["/typed-response", "/async/typed-response"]
+
+
+@pytest.mark.parametrize("path", PATHS)
+@pytest.mark.parametrize("shape", ["ok", "extra", "invalid"])
+def test_encoded(path, shape):
+    resp = Client().get(path, {"shape": shape})
+    assert resp.status_code == 200
+    assert resp["Content-Type"] == "application/json"
+    assert resp.json() == views.TYPED[shape]
+
+
+@pytest.mark.parametrize("path", PATHS)
+def test_compact(path):
+    assert Client().get(path).content == b'{"id":1,"name":"a","tags":["x"]}'
+    resp = Client().get(path, HTTP_ACCEPT="application/json; indent=4")
+    assert resp.content.startswith(b'{\n    "id": 1')
+
+
+@pytest.mark.parametrize("path", PATHS)
+def test_error_status_is_untouched(path, settings):
+    settings.DEBUG = True
+    resp = Client().get(path, {"shape": "error"})
+    assert resp.status_code == 404
+    assert resp.json() == {"message": "Not found"}
+
+
+@pytest.mark.parametrize("path", PATHS)
+def test_debug_check(path, settings):
+    settings.DEBUG = True
+    assert Client().get(path).status_code == 200
+    with pytest.raises(DataError):
+        Client().get(path, {"shape": "invalid"})
+
+
+def test_other_backend(monkeypatch):
+    pytest.importorskip("orjson")
+    monkeypatch.setattr("raw_api.JSON_BACKEND", get_backend("orjson"))
+    resp = Client().get("/typed-response")
+    assert resp.json() == {"id": 1, "name": "a", "tags": ["x"]}
+
+
+def test_custom_backend_with_stdlib_loads(monkeypatch):
+    def dumps(data, pretty=False):
+        return json.dumps(data, indent=1).encode()
+
+    monkeypatch.setattr("raw_api.JSON_BACKEND", JsonBackend(json.loads, dumps))
+    resp = Client().get("/typed-response")
+    assert resp.content == dumps({"id": 1, "name": "a", "tags": ["x"]})
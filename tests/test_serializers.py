@@ -0,0 +1,87 @@
+import dataclasses
+import datetime
+import decimal
+import uuid
+
+import pytest
+from asgiref.sync import async_to_sync
+from django.contrib.auth.models import User
+from django.test import AsyncClient, Client
+
+from raw_api import serializers
+
+POINT = {"x": 1, "y": "1.5", "at": "2020-01-02"}
+
+
+@pytest.mark.parametrize("path", ["/list-response", "/async/list-response"])
+def test_list_response(path):
+    resp = Client().get(path)
+    assert resp.status_code == 200
+    assert resp["Content-Type"] == "application/json"
+    assert resp.json() == [POINT]
+
+
+def test_dataclass_response():
+    resp = Client().get("/dataclass-response")
+    assert resp.status_code == 201
+    assert resp.json() == POINT
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize(
+    "path", ["/queryset-response", "/async/queryset-response"]
+)
+def test_queryset_response(path):
+    User.objects.create(username="bob")
+    User.objects.create(username="alice")
+    rows = Client().get(path).json()
+    assert [row["username"] for row in rows] == ["alice", "bob"]
+    assert isinstance(rows[0]["date_joined"], str)
+
+
+@pytest.mark.django_db
+def test_values_list_response():
+    User.objects.create(username="bob")
+    resp = Client().get("/values-list-response")
+    assert resp.json() == ["bob"]
+
+
+@async_to_sync
+async def _async_get_json(path):
+    return (await AsyncClient().get(path)).json()
+
+
+@pytest.mark.django_db(transaction=True)
+def test_async_queryset_response():
+    User.objects.create(username="bob")
+    rows = _async_get_json("/async/queryset-response")
+    assert [row["username"] for row in rows] == ["bob"]
+
+
+@pytest.mark.django_db(transaction=True)
+def test_async_nested_queryset_response():
+    User.objects.create(username="bob")
+    resp = _async_get_json("/async/nested-queryset-response")
+    assert resp == {"users": [{"username": "bob"}]}
+    with pytest.raises(TypeError):
+        _async_get_json("/async/deep-queryset-response")
+
+
+def test_default():
+    @dataclasses.dataclass
+    class One:
+        id: int
+
+    @dataclasses.dataclass
+    class Empty:
+        pass
+
+    value = uuid.uuid4()
+    assert serializers.default(One(1)) == {"id": 1}
+    assert serializers.default(Empty()) == {}
+    assert serializers.default(value) == str(value)
+    assert serializers.default(decimal.Decimal("1.10")) == "1.10"
+    assert serializers.default(datetime.time(1, 2)) == "01:02:00"
+    assert type(value) in serializers._serializers
+    with pytest.raises(TypeError):
+        serializers.default(object())
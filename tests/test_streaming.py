@@ -0,0 +1,176 @@
+import io
+import json
+import sys
+
+import pytest
+from asgiref.sync import async_to_sync
+from django.test import AsyncClient, Client
+
+from raw_api import streaming
+
+
+def test_json_array_stream():
+    resp = Client().get("/stream-response")
+    assert resp.status_code == 200
+    assert resp.streaming
+    assert resp["content-type"] == "application/json"
+    assert json.loads(b"".join(resp.streaming_content)) == [
+        {"id": 0},
+        {"id": 1},
+        {"id": 2},
+    ]
+
+
+@pytest.mark.skipif(
+    sys.version_info < (3, 12),
+    reason="Django treats bare generators as coroutines before Python 3.12",
+)
+def test_bare_generator_stream():
+    resp = Client().get("/bare-stream-response")
+    assert json.loads(b"".join(resp.streaming_content)) == [
+        {"id": 0},
+        {"id": 1},
+        {"id": 2},
+    ]
+
+
+@async_to_sync
+async def _async_get(path, **kwargs):
+    resp = await AsyncClient().get(path, **kwargs)
+    content = b"".join([chunk async for chunk in resp.streaming_content])
+    return resp, content
+
+
+def test_async_json_array_stream():
+    resp, content = _async_get("/async/stream-response")
+    assert resp.status_code == 200
+    assert resp["content-type"] == "application/json"
+    assert json.loads(content) == [{"id": 0}, {"id": 1}, {"id": 2}]
+
+
+def test_async_middleware_sync_stream():
+    # Chunks of sync generators are pulled in a thread, not all at once
+    resp, content = _async_get("/stream-response?count=20000")
+    assert resp.is_async
+    assert json.loads(content) == [{"id": i} for i in range(20000)]
+
+    resp, content = _async_get(
+        "/stream-response", headers={"accept": streaming.NDJSON_CONTENT_TYPE}
+    )
+    assert content == b'{"id":0}\n{"id":1}\n{"id":2}\n'
+
+
+def test_empty_json_array_stream():
+    resp = Client().get("/stream-response?count=0")
+    assert b"".join(resp.streaming_content) == b"[]"
+
+
+def test_ndjson_stream():
+    resp = Client().get(
+        "/stream-response", HTTP_ACCEPT=streaming.NDJSON_CONTENT_TYPE
+    )
+    assert resp["content-type"] == streaming.NDJSON_CONTENT_TYPE
+    assert b"".join(resp.streaming_content) == (
+        b'{"id":0}\n{"id":1}\n{"id":2}\n'
+    )
+
+
+def test_async_ndjson_stream():
+    resp, content = _async_get(
+        "/async/stream-response",
+        headers={"accept": streaming.NDJSON_CONTENT_TYPE},
+    )
+    assert resp["content-type"] == streaming.NDJSON_CONTENT_TYPE
+    assert content == b'{"id":0}\n{"id":1}\n{"id":2}\n'
+
+
+def test_large_stream_is_chunked():
+    count = 20000
+    resp = Client().get(f"/stream-response?count={count}")
+    chunks = list(resp.streaming_content)
+    assert len(chunks) > 1
+    assert all(len(c) < streaming.CHUNK_SIZE + 100 for c in chunks)
+    assert len(json.loads(b"".join(chunks))) == count
+
+
+def test_request_json_stream_array():
+    resp = Client().post(
+        "/request-json-stream", [1, {"a": 2}], content_type="application/json"
+    )
+    assert resp.status_code == 200
+    assert resp.json() == {"items": [1, {"a": 2}]}
+
+
+def test_request_json_stream_object():
+    resp = Client().post(
+        "/request-json-stream",
+        {"a": 1, "b": [2]},
+        content_type="application/json",
+    )
+    assert resp.status_code == 200
+    assert resp.json() == {"items": [["a", 1], ["b", [2]]]}
+
+
+def test_request_json_stream_broken():
+    resp = Client().post(
+        "/request-json-stream", "[1, 2", content_type="application/json"
+    )
+    assert resp.status_code == 400
+
+
+def test_iter_json_chunks():
+    items = [{"id": i, "n": i / 3, "s": "ы" * i} for i in range(100)]
+    read = io.BytesIO(json.dumps(items).encode()).read
+    assert list(streaming.iter_json(read, chunk_size=1)) == items
+
+
+def test_iter_json_chunks_cut_values():
+    body = (
+        r'[true, null, -1.5e-3, 10, "\u044b\"", "\ud83d\ude00", '
+        r'-Infinity, {"a": [false, 1e5]}]'
+    )
+    items = json.loads(body)
+    for chunk_size in (1, 2, 3, 5):
+        read = io.BytesIO(body.encode()).read
+        assert list(streaming.iter_json(read, chunk_size)) == items
+
+
+@pytest.mark.parametrize("body", [b"[1, x", b"[1x", b'{"a" 1', b"[tx"])
+def test_iter_json_invalid_stops_reading(body):
+    stream = io.BytesIO(body + b" " * 100_000)
+    with pytest.raises(ValueError):
+        list(streaming.iter_json(stream.read, chunk_size=2))
+    assert stream.tell() < 100
+
+
+@pytest.mark.parametrize(
+    "path", ["/json-stream-validation", "/async/json-stream-validation"]
+)
+def test_json_stream_validation_ok(path):
+    resp = Client().post(
+        path, [{"id": "1"}, {"id": 2}], content_type="application/json"
+    )
+    assert resp.status_code == 200
+    assert resp.json() == {"ids": [1, 2]}
+
+
+@pytest.mark.parametrize(
+    "path", ["/json-stream-validation", "/async/json-stream-validation"]
+)
+def test_json_stream_validation_error(path):
+    resp = Client().post(
+        path, [{"id": 1}, {"id": "foo"}], content_type="application/json"
+    )
+    assert resp.status_code == 400
+    assert resp.json() == {
+        "message": "Bad request",
+        "errors": {"1": {"id": "value can't be converted to int"}},
+    }
+
+
+@pytest.mark.parametrize(
+    "path", ["/json-stream-validation", "/async/json-stream-validation"]
+)
+def test_json_stream_validation_method_not_allowed(path):
+    resp = Client().get(path)
+    assert resp.status_code == 405
@@ -0,0 +1,53 @@
+import pytest
+from django.test import Client
+
+
+@pytest.fixture
+def timings(monkeypatch):
+    reported = []
+    monkeypatch.setattr("raw_api.TIMING", True)
+    monkeypatch.setattr(
+        "raw_api.TIMING_CALLBACK",
+        lambda request, timings: reported.append(timings),
+    )
+    return reported
+
+
+def _server_timing(resp):
+    return [item.split(";")[0] for item in resp["Server-Timing"].split(", ")]
+
+
+@pytest.mark.parametrize(
+    "path", ["/json-validation", "/async/json-validation"]
+)
+def test_json_stages(timings, path):
+    resp = Client().post(path, {"id": "1"}, content_type="application/json")
+    assert resp.json() == {"id": 1}
+    assert _server_timing(resp) == [
+        "parse",
+        "validation",
+        "view",
+        "serialization",
+        "total",
+    ]
+    [reported] = timings
+    assert all(isinstance(ns, int) and ns >= 0 for ns in reported.values())
+    assert reported["total"] >= reported["view"] + reported["serialization"]
+
+
+@pytest.mark.parametrize(
+    "path", ["/query-validation?id=1", "/async/query-validation?id=1"]
+)
+def test_query_stages(timings, path):
+    resp = Client().get(path)
+    assert _server_timing(resp) == [
+        "validation",
+        "view",
+        "serialization",
+        "total",
+    ]
+
+
+def test_disabled_by_default():
+    resp = Client().get("/dict-response")
+    assert not resp.has_header("Server-Timing")
@@ -1,5 +1,6 @@
 from django.urls import path
 
+import raw_api
 import views
 
 urlpatterns = [
@@ -13,6 +14,17 @@ urlpatterns = [
     path("async/tuple-string-response", views.async_tuple_string_response),
     path("django-response", views.django_response),
     path("async/django-response", views.async_django_response),
+    path("list-response", views.list_response),
+    path("async/list-response", views.async_list_response),
+    path("dataclass-response", views.dataclass_response),
+    path("queryset-response", views.queryset_response),
+    path("async/queryset-response", views.async_queryset_response),
+    path("values-list-response", views.values_list_response),
+    path(
+        "async/nested-queryset-response",
+        views.async_nested_queryset_response,
+    ),
+    path("async/deep-queryset-response", views.async_deep_queryset_response),
     path("request-json", views.request_json),
     path("async/request-json", views.async_request_json),
     path("require-user", views.require_user),
@@ -23,4 +35,46 @@ urlpatterns = [
     path("async/query-validation", views.async_query_validation),
     path("json-validation", views.json_validation),
     path("async/json-validation", views.async_json_validation),
+    path("stream-response", views.stream_response),
+    path("large-response", views.large_response),
+    path("etag-by-content", views.etag_by_content),
+    path("async/etag-by-content", views.async_etag_by_content),
+    path("etag-by-version", views.etag_by_version),
+    path("async/etag-by-version", views.async_etag_by_version),
+    path("json-limits", views.json_limits),
+    path("async/json-limits", views.async_json_limits),
+    path("rate-limited", views.rate_limited),
+    path("async/rate-limited", views.async_rate_limited),
+    path("rate-limited-per-user", views.rate_limited_per_user),
+    path("async/rate-limited-per-user", views.async_rate_limited_per_user),
+    path("rate-limited-by-token", views.rate_limited_by_token),
+    path("async/rate-limited-by-token", views.async_rate_limited_by_token),
+    path("rate-limited-in-cache", views.rate_limited_in_cache),
+    path("async/rate-limited-in-cache", views.async_rate_limited_in_cache),
+    path("idempotent-create", views.idempotent_create),
+    path("async/idempotent-create", views.async_idempotent_create),
+    path("async/coalesced", views.coalesced),
+    path("typed-response", views.typed_response),
+    path("async/typed-response", views.async_typed_response),
+    path("memoized-query", views.memoized_query),
+    path("async/memoized-query", views.async_memoized_query),
+    path("stacked-endpoint", views.stacked_endpoint),
+    path("async/stacked-endpoint", views.async_stacked_endpoint),
+    path("fused-endpoint", views.fused_endpoint),
+    path("async/fused-endpoint", views.async_fused_endpoint),
+    path("user-get-endpoint", views.user_get_endpoint),
+    path("async/user-get-endpoint", views.async_user_get_endpoint),
+    path("async/sync-work", views.sync_work),
+    path("async/sync-callbacks", views.sync_callbacks),
+    path("async/ajson", views.ajson),
+    path("batch", raw_api.batch),
+    path("cached", views.cached),
+    path("async/cached", views.async_cached),
+    path("cached-per-user", views.cached_per_user),
+    path("async/cached-per-user", views.async_cached_per_user),
+    path("request-json-stream", views.request_json_stream),
+    path("json-stream-validation", views.json_stream_validation),
+    path("async/json-stream-validation", views.async_json_stream_validation),
+    path("bare-stream-response", views.bare_stream_response),
+    path("async/stream-response", views.async_stream_response),
 ]
@@ -1,8 +1,26 @@
+import asyncio
+import dataclasses
+import datetime
+import decimal
+import threading
+import time
+
+import trafaret as t
 from asgiref.sync import sync_to_async
 from django.contrib.auth import get_user
+from django.contrib.auth.models import User
 from django.http import HttpResponse
 
 from raw_api import (
+    DjangoCacheRateStore,
+    cache_response,
+    coalesce,
+    endpoint,
+    etag,
+    idempotent,
+    rate_limit,
+    returns,
+    run_sync,
     staff_required,
     user_required,
     validate_json,
@@ -96,3 +114,340 @@ def json_validation(request):
 @validate_json({"id": int})
 async def async_json_validation(request):
     return request.json
+
+
+def stream_response(request):
+    return ({"id": i} for i in range(int(request.GET.get("count", 3)))), 200
+
+
+def bare_stream_response(request):
+    return ({"id": i} for i in range(3))
+
+
+async def async_stream_response(request):
+    async def items():
+        for i in range(int(request.GET.get("count", 3))):
+            yield {"id": i}
+
+    return items()
+
+
+def request_json_stream(request):
+    return {"items": list(request.json_stream)}
+
+
+@validate_json({"id": int}, stream=True)
+def json_stream_validation(request):
+    return {"ids": [item["id"] for item in request.json_stream]}
+
+
+@validate_json({"id": int}, stream=True)
+async def async_json_stream_validation(request):
+    return {"ids": [item["id"] for item in request.json_stream]}
+
+
+calls = {"cached": 0, "idempotent": 0, "coalesced": 0}
+
+
+@validate_query({"id": int})
+@cache_response(ttl=60)
+def cached(request):
+    calls["cached"] += 1
+    return {"id": request.query["id"], "calls": calls["cached"]}
+
+
+@validate_query({"id": int})
+@cache_response(ttl=60)
+async def async_cached(request):
+    calls["cached"] += 1
+    return {"id": request.query["id"], "calls": calls["cached"]}
+
+
+@cache_response(ttl=60, vary_on_user=True)
+def cached_per_user(request):
+    calls["cached"] += 1
+    return {"user": request.user.username, "calls": calls["cached"]}
+
+
+@cache_response(ttl=60, vary_on_user=True)
+async def async_cached_per_user(request):
+    calls["cached"] += 1
+    return {"user": request.user.username, "calls": calls["cached"]}
+
+
+versions = {"etag": "1"}
+
+
+@etag()
+def etag_by_content(request):
+    return {"hello": "world"}
+
+
+@etag()
+async def async_etag_by_content(request):
+    return {"hello": "world"}
+
+
+@etag(version=lambda request: versions["etag"])
+def etag_by_version(request):
+    calls["etag"] = calls.get("etag", 0) + 1
+    return {"version": versions["etag"]}
+
+
+async def _async_version(request):
+    return versions["etag"]
+
+
+@etag(version=_async_version)
+async def async_etag_by_version(request):
+    calls["etag"] = calls.get("etag", 0) + 1
+    return {"version": versions["etag"]}
+
+
+def large_response(request):
+    return {"items": list(range(1000))}
+
+
+@validate_json(
+    [t.Any()],
+    max_body_size=100,
+    max_depth=3,
+    max_keys=3,
+    max_string_length=5,
+)
+def json_limits(request):
+    return {"items": request.json}
+
+
+@validate_json(
+    [t.Any()],
+    max_body_size=100,
+    max_depth=3,
+    max_keys=3,
+    max_string_length=5,
+)
+async def async_json_limits(request):
+    return {"items": request.json}
+
+
+@dataclasses.dataclass
+class Point:
+    x: int
+    y: decimal.Decimal
+    at: datetime.date
+
+
+def list_response(request):
+    return [Point(1, decimal.Decimal("1.5"), datetime.date(2020, 1, 2))]
+
+
+async def async_list_response(request):
+    return [Point(1, decimal.Decimal("1.5"), datetime.date(2020, 1, 2))]
+
+
+def dataclass_response(request):
+    return Point(1, decimal.Decimal("1.5"), datetime.date(2020, 1, 2)), 201
+
+
+def queryset_response(request):
+    return User.objects.order_by("username")
+
+
+async def async_queryset_response(request):
+    return User.objects.order_by("username")
+
+
+async def async_nested_queryset_response(request):
+    return {"users": User.objects.order_by("username").values("username")}
+
+
+async def async_deep_queryset_response(request):
+    return {"page": {"users": User.objects.values("username")}}
+
+
+def values_list_response(request):
+    return User.objects.order_by("username").values_list("username", flat=True)
+
+
+@rate_limit("2/m", key="ip")
+def rate_limited(request):
+    return {"ok": True}
+
+
+@rate_limit("2/m", key="ip")
+async def async_rate_limited(request):
+    return {"ok": True}
+
+
+@rate_limit("1/m")
+def rate_limited_per_user(request):
+    return {"ok": True}
+
+
+@rate_limit("1/m")
+async def async_rate_limited_per_user(request):
+    return {"ok": True}
+
+
+@rate_limit("1/m", key=lambda request: request.GET.get("token"))
+def rate_limited_by_token(request):
+    return {"ok": True}
+
+
+async def _token(request):
+    return request.GET.get("token")
+
+
+@rate_limit("1/m", key=_token)
+async def async_rate_limited_by_token(request):
+    return {"ok": True}
+
+
+@rate_limit("2/m", key="ip", store=DjangoCacheRateStore())
+def rate_limited_in_cache(request):
+    return {"ok": True}
+
+
+@rate_limit("2/m", key="ip", store=DjangoCacheRateStore())
+async def async_rate_limited_in_cache(request):
+    return {"ok": True}
+
+
+@idempotent()
+@validate_json({"id": int, "sleep?": float})
+def idempotent_create(request):
+    calls["idempotent"] += 1
+    time.sleep(request.json.get("sleep", 0))
+    if request.json["id"] < 0:
+        return {"message": "Server error"}, 500
+    return {"id": request.json["id"], "calls": calls["idempotent"]}, 201
+
+
+@idempotent()
+@validate_json({"id": int, "sleep?": float})
+async def async_idempotent_create(request):
+    calls["idempotent"] += 1
+    await asyncio.sleep(request.json.get("sleep", 0))
+    if request.json["id"] < 0:
+        return {"message": "Server error"}, 500
+    return {"id": request.json["id"], "calls": calls["idempotent"]}, 201
+
+
+@validate_query({"id": int})
+@coalesce()
+async def coalesced(request):
+    calls["coalesced"] += 1
+    await asyncio.sleep(0.05)
+    if request.query["id"] < 0:
+        raise ValueError("Negative id")
+    return {"id": request.query["id"], "calls": calls["coalesced"]}
+
+
+TYPED = {
+    "ok": {"id": 1, "name": "a", "tags": ["x"]},
+    "extra": {"id": 1, "name": "a", "tags": [], "extra": True},
+    "invalid": {"id": "1", "name": "", "tags": []},
+}
+
+
+def _typed(request):
+    shape = request.GET.get("shape", "ok")
+    if shape == "error":
+        return {"message": "Not found"}, 404
+    return TYPED[shape]
+
+
+@returns({"id": int, "name": str, "tags": [str], "note?": str})
+def typed_response(request):
+    return _typed(request)
+
+
+@returns({"id": int, "name": str, "tags": [str], "note?": str})
+async def async_typed_response(request):
+    return _typed(request)
+
+
+@validate_query({"id": int, "q?": str}, cache_size=2)
+def memoized_query(request):
+    return {"query": dict(request.query), "read_only": _is_read_only(request)}
+
+
+@validate_query({"id": int, "q?": str}, cache_size=2)
+async def async_memoized_query(request):
+    return {"query": dict(request.query), "read_only": _is_read_only(request)}
+
+
+def _is_read_only(request):
+    try:
+        request.query["id"] = 0
+    except TypeError:
+        return True
+    return False
+
+
+@staff_required
+@validate_query({"id": int})
+@validate_json({"name": str})
+def stacked_endpoint(request):
+    return {"query": request.query, "json": request.json}
+
+
+@staff_required
+@validate_query({"id": int})
+@validate_json({"name": str})
+async def async_stacked_endpoint(request):
+    return {"query": request.query, "json": request.json}
+
+
+@endpoint(auth="staff", query={"id": int}, json={"name": str})
+def fused_endpoint(request):
+    return {"query": request.query, "json": request.json}
+
+
+@endpoint(auth="staff", query={"id": int}, json={"name": str})
+async def async_fused_endpoint(request):
+    return {"query": request.query, "json": request.json}
+
+
+@endpoint(auth="user", methods=["get"])
+def user_get_endpoint(request):
+    return {"user": request.user.username}
+
+
+@endpoint(auth="user", methods=["get"])
+async def async_user_get_endpoint(request):
+    return {"user": request.user.username}
+
+
+sync_work_started = threading.Event()
+sync_work_release = threading.Event()
+
+
+def _blocking_work(seconds):
+    sync_work_started.set()
+    sync_work_release.wait(seconds)
+    return threading.current_thread().name
+
+
+@validate_query({"seconds": float})
+async def sync_work(request):
+    thread = await run_sync(request, _blocking_work, request.query["seconds"])
+    return {"thread": thread}
+
+
+callback_threads = []
+
+
+def _sync_callback(request):
+    callback_threads.append(threading.current_thread().name)
+    return "v1"
+
+
+@rate_limit("100/m", key=_sync_callback)
+@etag(version=_sync_callback)
+async def sync_callbacks(request):
+    return {"ok": True}
+
+
+async def ajson(request):
+    return {"json": await request.ajson()}